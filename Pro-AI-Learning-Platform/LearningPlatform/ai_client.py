@@ -0,0 +1,155 @@
+# Shared HTTP client for DeepSeek/OpenRouter-style Chat Completions
+# One pooled keep-alive session per base_url, reused by every Streamlit script run
+# Retries 429/5xx with exponential backoff and uses split connect/read timeouts
+# stream_ai_chat() yields tokens from the SSE ("stream": true) variant of the same endpoint
+# requests is imported when the first session is built, keeping it off the cold-start path
+
+import json
+import os
+import threading
+import time
+
+import metrics
+
+DEFAULT_BASE_URL = "https://api.deepseek.com/v1"
+DEFAULT_MODEL = "deepseek-chat"
+
+# ---------------- Tunables (env overridable) ----------------
+CONNECT_TIMEOUT = float(os.getenv("AI_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("AI_READ_TIMEOUT", "60"))
+MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "16"))  # open connections per upstream
+MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "3"))
+BACKOFF_FACTOR = float(os.getenv("AI_BACKOFF_FACTOR", "0.5"))  # 0.5s, 1s, 2s ...
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _build_session():
+    # requests/urllib3 load on the first AI call, not at app start-up
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=0,  # never replay a request the upstream may already be generating
+        status=MAX_RETRIES,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(["POST"]),
+        backoff_factor=BACKOFF_FACTOR,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    # pool_block=True caps in-flight requests per upstream at MAX_CONCURRENCY;
+    # extra callers wait for a free keep-alive connection instead of opening new ones
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENCY,
+                          max_retries=retry, pool_block=True)
+    s = requests.Session()
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+def get_session(base_url=DEFAULT_BASE_URL):
+    # process-wide, cached once per base_url
+    key = base_url.rstrip('/')
+    s = _sessions.get(key)
+    if s is None:
+        with _sessions_lock:
+            s = _sessions.get(key)
+            if s is None:
+                s = _build_session()
+                _sessions[key] = s
+    return s
+
+
+def close_sessions():
+    with _sessions_lock:
+        for s in _sessions.values():
+            s.close()
+        _sessions.clear()
+
+
+def call_ai_chat(messages, api_key, base_url=DEFAULT_BASE_URL, model=DEFAULT_MODEL):
+    if not api_key:
+        return None, "API key missing. Paste your DeepSeek/OpenRouter API key in sidebar to enable live AI."
+    url = base_url.rstrip('/') + "/chat/completions"
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    payload = {"model": model, "messages": messages}
+    t = time.perf_counter()
+    status = "error"
+    try:
+        r = get_session(base_url).post(url, headers=headers, json=payload,
+                                       timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        status = str(r.status_code)
+        if r.status_code != 200:
+            return None, f"API error {r.status_code}: {r.text[:300]}"
+        data = r.json()
+        # safe access
+        txt = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+        return txt, None
+    except Exception as e:
+        return None, f"Request failed: {e}"
+    finally:
+        metrics.AI_REQUEST_SECONDS.observe(time.perf_counter() - t, mode="sync")
+        metrics.AI_REQUESTS.inc(mode="sync", status=status)
+
+
+class TokenStream:
+    # iterates over the content deltas of a "data: {...}" server-sent event stream as they arrive.
+    # A dropped connection ends the iteration early and sets .error, so callers can tell a
+    # partial answer from a complete one.
+    def __init__(self, r, t):
+        self._r, self._t = r, t
+        self.error = None
+
+    def __iter__(self):
+        try:
+            for line in self._r.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue  # keep-alive blanks and ": comment" lines
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except ValueError:
+                    continue
+                delta = (chunk.get("choices") or [{}])[0].get("delta", {})
+                tok = delta.get("content")
+                if tok:
+                    yield tok
+        except Exception as e:
+            self.error = f"Stream interrupted: {e}"
+        finally:
+            self._r.close()
+            metrics.AI_REQUEST_SECONDS.observe(time.perf_counter() - self._t, mode="stream")
+
+
+def stream_ai_chat(messages, api_key, base_url=DEFAULT_BASE_URL, model=DEFAULT_MODEL):
+    # same contract as call_ai_chat but returns (TokenStream, err); check .error after iterating
+    if not api_key:
+        return None, "API key missing. Paste your DeepSeek/OpenRouter API key in sidebar to enable live AI."
+    url = base_url.rstrip('/') + "/chat/completions"
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json",
+               "Accept": "text/event-stream"}
+    payload = {"model": model, "messages": messages, "stream": True}
+    t = time.perf_counter()
+    try:
+        r = get_session(base_url).post(url, headers=headers, json=payload, stream=True,
+                                       timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    except Exception as e:
+        metrics.AI_REQUESTS.inc(mode="stream", status="error")
+        return None, f"Request failed: {e}"
+    metrics.AI_REQUESTS.inc(mode="stream", status=r.status_code)
+    metrics.AI_TTFB_SECONDS.observe(time.perf_counter() - t)
+    if r.status_code != 200:
+        err = f"API error {r.status_code}: {r.text[:300]}"
+        r.close()
+        return None, err
+    if r.encoding is None:
+        r.encoding = "utf-8"
+    return TokenStream(r, t), None
@@ -0,0 +1,174 @@
+# Asynchronous AI job queue
+# One asyncio loop on a daemon thread serves every Streamlit session in the process:
+#   - submit() returns a job id immediately; poll() reports queued/running/done
+#   - identical in-flight requests (same messages/model/base_url/key) share one upstream call
+#   - a bounded worker pool caps concurrent upstream calls
+#   - a token bucket per (API key, base_url) smooths bursts below provider rate limits;
+#     streamed answers bypass the queue but take their token from the same bucket (acquire())
+# Upstream calls go through ai_client.call_ai_chat (pooled session) on a thread executor.
+
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_client import DEFAULT_MODEL, call_ai_chat
+
+WORKERS = int(os.getenv("AI_JOB_WORKERS", "8"))
+RATE_PER_SEC = float(os.getenv("AI_RATE_PER_SEC", "2"))  # sustained requests/sec per key+base_url
+BURST = int(os.getenv("AI_RATE_BURST", "5"))
+JOB_TTL = 600  # seconds a finished job stays pollable
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Job:
+    __slots__ = ("id", "key", "status", "result", "error", "created", "finished", "waiters", "done")
+
+    def __init__(self, job_id, key):
+        self.id = job_id
+        self.key = key
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.waiters = 1  # sessions sharing this job
+        self.done = threading.Event()
+
+
+def request_key(messages, api_key, base_url, model):
+    blob = json.dumps([messages, base_url.rstrip('/'), model], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256((blob + "\n" + (api_key or "")).encode("utf-8")).hexdigest()
+
+
+class AIDispatcher:
+    def __init__(self, workers=WORKERS, rate=RATE_PER_SEC, burst=BURST, call=call_ai_chat):
+        self.rate = rate
+        self.burst = burst
+        self._call = call
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._jobs = {}       # job id -> Job
+        self._inflight = {}   # request key -> Job
+        self._buckets = {}    # (key hash, base_url) -> TokenBucket
+        self.submitted = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-job")
+        self._loop = asyncio.new_event_loop()
+        self._sem = None
+        ready = threading.Event()
+        threading.Thread(target=self._serve, args=(ready, workers), daemon=True, name="ai-dispatcher").start()
+        ready.wait()
+
+    def _serve(self, ready, workers):
+        asyncio.set_event_loop(self._loop)
+        self._sem = asyncio.Semaphore(workers)
+        ready.set()
+        self._loop.run_forever()
+
+    # ---------------- public API (any thread) ----------------
+    def submit(self, messages, api_key, base_url, model=DEFAULT_MODEL):
+        key = request_key(messages, api_key, base_url, model)
+        with self._lock:
+            self._prune()
+            self.submitted += 1
+            job = self._inflight.get(key)
+            if job is not None:
+                job.waiters += 1
+                self.coalesced += 1
+                return job.id
+            job = Job(next(self._ids), key)
+            self._jobs[job.id] = job
+            self._inflight[key] = job
+        asyncio.run_coroutine_threadsafe(self._run(job, messages, api_key, base_url, model), self._loop)
+        return job.id
+
+    def acquire(self, api_key, base_url):
+        # blocks until the key's bucket has a token; for upstream calls made outside the queue
+        if api_key:  # same as _run: a missing key fails fast without spending a token
+            asyncio.run_coroutine_threadsafe(self._acquire(api_key, base_url), self._loop).result()
+
+    def poll(self, job_id):
+        # -> (status, txt, err); status is "queued", "running", "done" or "unknown"
+        job = self._jobs.get(job_id)
+        if job is None:
+            return "unknown", None, "Job expired, please ask again."
+        return job.status, job.result, job.error
+
+    def wait(self, job_id, timeout=None):
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.done.wait(timeout)
+        return self.poll(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {"submitted": self.submitted, "coalesced": self.coalesced,
+                    "upstream_calls": self.upstream_calls, "inflight": len(self._inflight)}
+
+    # ---------------- loop side ----------------
+    def _bucket(self, api_key, base_url):
+        k = (hashlib.sha256((api_key or "").encode("utf-8")).hexdigest(), base_url.rstrip('/'))
+        b = self._buckets.get(k)
+        if b is None:
+            b = self._buckets[k] = TokenBucket(self.rate, self.burst)
+        return b
+
+    async def _acquire(self, api_key, base_url):
+        await self._bucket(api_key, base_url).acquire()
+        with self._lock:
+            self.upstream_calls += 1
+
+    async def _run(self, job, messages, api_key, base_url, model):
+        try:
+            # wait on the key's own bucket before taking a worker slot, so one key's backlog
+            # cannot hold every slot while other keys' buckets are full
+            if api_key:  # a missing key fails fast in call_ai_chat without spending a token
+                await self._bucket(api_key, base_url).acquire()
+            async with self._sem:
+                job.status = "running"
+                with self._lock:
+                    self.upstream_calls += 1
+                txt, err = await self._loop.run_in_executor(
+                    self._executor, self._call, messages, api_key, base_url, model)
+        except Exception as e:
+            txt, err = None, f"Request failed: {e}"
+        with self._lock:
+            job.result, job.error = txt, err
+            job.status = "done"
+            job.finished = time.time()
+            self._inflight.pop(job.key, None)
+        job.done.set()
+
+    def _prune(self):
+        # jobs dict is in submit order; drop expired ones from the front
+        cutoff = time.time() - JOB_TTL
+        while self._jobs:
+            job = next(iter(self._jobs.values()))
+            if not job.finished or job.finished >= cutoff:
+                break
+            del self._jobs[job.id]
@@ -1,51 +1,48 @@
 # Pro version: Attractive AI Learning Platform
 # Works with Python 3.11 + latest Streamlit
-# Uses requests to call DeepSeek/OpenRouter-style Chat Completions
+# Uses a pooled, retrying requests session (ai_client.py) to call DeepSeek/OpenRouter-style Chat Completions
 
 import streamlit as st
-import requests
-import pandas as pd
-import numpy as np
 import base64
-from io import BytesIO
 from datetime import datetime
 import random
 import os
 import textwrap
 import time
+import threading
+import pickle
+import csv
+import io
+import json
+
+from ai_client import stream_ai_chat
+from ai_jobs import AIDispatcher
+from response_cache import ResponseCache
+from storage import Storage
+from leaderboard import Leaderboard, boards_for
+from question_bank import QuestionBank
+import grading
+from photos import PhotoStore, is_ref
+import metrics
+from conversations import ConversationStore
+from content import AI_TOOLS, DEMO_ACCOUNTS, MOTIVATION, PRACTICE_BANK, PROGRAMS, RESOURCES
+from config import (ADMIN_PASSWORD, ADMIN_USERS, BANK_DIR, DATA_DIR, DB_PATH, SEED_DEMO_USERS, SESSION_COOKIE,
+                    SESSION_SECRET, SESSION_SIZE_EVERY, SESSION_STORE)
+from sessions import AuthStore, open_kv
+from review_batch import REVIEW_SYSTEM, BulkReview, ReviewStore, load_submissions
+
+_rerun_t0 = time.perf_counter()
 
 # ---------------- Page & CSS ----------------
 st.set_page_config(page_title="Pro AI Learning Platform", layout="wide", page_icon="🎓")
 
-CSS = """
-<style>
-:root {
-  --bg1: #0f172a;
-  --card: rgba(255,255,255,0.03);
-  --accent1: #5ab0ff;
-  --accent2: #ff6ec7;
-  --text: #e6eef8;
-  --muted: #9aa6b2;
-}
-body { background: linear-gradient(180deg, #07102a 0%, #0f172a 100%); color: var(--text); }
-.block-container{padding-top:1rem;}
-.header-card{
-  background: linear-gradient(90deg, rgba(90,176,255,0.12), rgba(255,110,199,0.09));
-  border-radius:14px; padding:18px; margin-bottom:12px; box-shadow:0 8px 30px rgba(0,0,0,0.35);
-}
-.card{
-  background: rgba(255,255,255,0.02); border-radius:12px; padding:14px; margin-bottom:12px;
-  border: 1px solid rgba(255,255,255,0.03);
-}
-.h1 { color: #bfe9ff; font-weight:700; }
-.h2 { color: #ffd1ea; font-weight:700; }
-.small { color: var(--muted); font-size:12px; }
-.kpi { padding:12px; border-radius:10px; background: linear-gradient(90deg, rgba(90,176,255,0.06), rgba(255,110,199,0.04)); text-align:center; }
-.profile-photo { border-radius: 12px; border:1px solid rgba(255,255,255,0.04); }
-.question-card{ background: rgba(255,255,255,0.01); padding:10px; border-radius:10px; margin-bottom:8px;}
-</style>
-"""
-st.markdown(CSS, unsafe_allow_html=True)
+@st.cache_resource
+def load_css():
+    # read once per process; every full rerun still re-sends it, fragments don't
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "styles.css"), encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
+
+st.markdown(load_css(), unsafe_allow_html=True)
 
 # ---------------- Session defaults ----------------
 if 'logged_in' not in st.session_state:
@@ -59,103 +56,101 @@ if 'scores' not in st.session_state:
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
 
-# ---------------- Static Data ----------------
-PROGRAMS = [
-    "AI","ML","Business Analytics","BBA","Data Analytics","Robotics",
-    "Biotechnology","Agriculture","Law","Hospital Management","Digital Marketing"
-]
-
-AI_TOOLS = {
-    "AI": [("GPT/DeepSeek","Explanation & code"), ("Kaggle","Datasets & notebooks"), ("Colab","Free notebooks")],
-    "ML": [("Scikit-learn","Classical ML"), ("TensorFlow","Deep Learning"), ("Weights & Biases","Experiment tracking")],
-    "Business Analytics": [("Power BI","Dashboards"), ("Tableau","Viz"), ("Excel","Reporting")],
-    "BBA": [("Excel","Finance models"), ("Notion","Notes"), ("Grammarly","Writing")],
-    "Data Analytics": [("Pandas","Data manipulation"), ("SQL","Queries"), ("Plotly","Interactive charts")],
-    "Robotics": [("ROS/ROS2","Middleware"), ("Gazebo","Simulation"), ("OpenCV","Vision")],
-    "Biotechnology": [("Biopython","Bioinformatics"), ("NCBI/PubMed","Research"), ("BLAST","Sequence search")],
-    "Agriculture": [("GIS/QGIS","Mapping"), ("Remote sensing","Crop monitoring")],
-    "Law": [("Legal search","Case lookup"), ("Citation tools","References")],
-    "Hospital Management": [("EMR/HIS","Records"), ("Power BI","Operations dashboards")],
-    "Digital Marketing": [("Google Analytics","Metrics"), ("Meta Ads","Ads optimization")]
-}
-
-RESOURCES = {
-    "AI":["fast.ai course","DeepLearning.AI nanodegree"],
-    "ML":["Hands-On ML book","Scikit-learn docs"],
-    "Business Analytics":["Power BI guide","Kaggle BA datasets"],
-    "Robotics":["ROS tutorials","Gazebo docs"],
-    "Data Analytics":["SQL tutorials","Pandas docs"]
-}
-
-MOTIVATION = [
-    "Small progress each day adds up to big results.",
-    "Consistency > intensity — show up daily.",
-    "Practice is how expertise is built.",
-    "Mistakes are proof that you are trying."
-]
+# ---------------- Shared resources ----------------
+@st.cache_resource
+def start_metrics_exporters():
+    # once per process: Prometheus scrape endpoint and/or textfile export
+    if os.getenv("METRICS_PORT"):
+        metrics.start_http_server(int(os.getenv("METRICS_PORT")))
+    if os.getenv("METRICS_FILE"):
+        metrics.start_file_exporter(os.getenv("METRICS_FILE"))
+    return True
+
+start_metrics_exporters()
+
+@st.cache_resource
+def get_response_cache():
+    # one SQLite-backed cache per process; the file is shared by every server process
+    return ResponseCache(os.getenv("AI_CACHE_PATH", os.path.join(DATA_DIR, "ai_cache.sqlite3")),
+                         max_entries=int(os.getenv("AI_CACHE_MAX_ENTRIES", "5000")),
+                         ttl_seconds=int(os.getenv("AI_CACHE_TTL", str(7*24*3600))),
+                         semantic=os.getenv("AI_CACHE_SEMANTIC", "0") == "1")
+
+@st.cache_resource
+def get_dispatcher():
+    # shared by all sessions: bounded workers, per-key rate limit, in-flight coalescing
+    return AIDispatcher()
+
+@st.cache_resource
+def get_storage():
+    # one reused connection per process (SQLite WAL handles concurrent readers)
+    return Storage(DB_PATH)
+
+@st.cache_resource
+def get_photo_store():
+    # thumbnails on disk by content hash, recent ones kept in a bounded LRU
+    return PhotoStore(os.getenv("PHOTO_DIR", os.path.join(DATA_DIR, "photos")))
+
+@st.cache_resource
+def get_question_bank():
+    # parsed and indexed once per process, shared by every session
+    return QuestionBank.from_dir(BANK_DIR)
+
+@st.cache_resource
+def get_leaderboard():
+    lb = Leaderboard(DB_PATH)
+    lb.backfill_from_attempts()
+    return lb
+
+@st.cache_resource
+def get_auth():
+    # credentials + signed session tokens in a store every app process shares
+    auth = AuthStore(open_kv(SESSION_STORE), SESSION_SECRET)
+    if SEED_DEMO_USERS:
+        auth.seed(DEMO_ACCOUNTS)
+    if ADMIN_PASSWORD:
+        for u in ADMIN_USERS:
+            auth.add_user(u, ADMIN_PASSWORD, overwrite=True)
+    return auth
+
+@st.cache_resource
+def get_review_store():
+    # graded practice answers by answer hash (cache + checkpoint for bulk review)
+    return ReviewStore(DB_PATH)
+
+@st.cache_resource
+def get_conversations():
+    # tutor threads + per-turn token counts, same SQLite file as the rest of the app
+    return ConversationStore(DB_PATH)
+
+def load_user_state(username):
+    # hydrate the per-tab session from the durable store after login/reconnect
+    db = get_storage()
+    st.session_state.profile = db.get_profile(username)
+    st.session_state.scores = db.list_scores(username)
+    st.session_state.chat_history = db.recent_chat(username)
 
 # ---------------- Utility functions ----------------
-def img_to_b64(file):
-    if not file:
+def profile_photo(prof, size=280):
+    # thumbnail bytes for the profile's photo ref; migrates legacy base64 photos once.
+    # The dashboard draws it 140 px wide, so the 280 px file stays sharp on high-DPI screens
+    ref = prof.get("photo")
+    if not ref:
         return None
-    data = file.read()
-    return base64.b64encode(data).decode('utf-8')
-
-def call_ai_chat(messages, api_key, base_url="https://api.deepseek.com/v1", model="deepseek-chat"):
-    if not api_key:
-        return None, "API key missing. Paste your DeepSeek/OpenRouter API key in sidebar to enable live AI."
-    url = base_url.rstrip('/') + "/chat/completions"
-    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-    payload = {"model": model, "messages": messages}
-    try:
-        r = requests.post(url, headers=headers, json=payload, timeout=60)
-        if r.status_code != 200:
-            return None, f"API error {r.status_code}: {r.text[:300]}"
-        data = r.json()
-        # safe access
-        txt = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-        return txt, None
-    except Exception as e:
-        return None, f"Request failed: {e}"
-
-def generate_daily_quiz(program):
-    # Lightweight quiz generation using static pools + program specific tweak
-    # We'll create 20 MCQs by sampling and customizing first few for program
-    base_mcq = [
-        ("Which library is commonly used for data analysis in Python?", ["pandas","NumPy","Matplotlib","Flask"], "pandas"),
-        ("Which tool is popular for BI dashboards?", ["Power BI","Git","Linux","Docker"], "Power BI"),
-        ("What does ETL stand for?", ["Extract Transform Load","Enter Test Leave","Edit Transfer Log","None"], "Extract Transform Load"),
-        ("Which is a supervised learning algorithm?", ["K-Means","Linear Regression","DBSCAN","PCA"], "Linear Regression"),
-        ("Which library is used for computer vision tasks?", ["OpenCV","pandas","Flask","Requests"], "OpenCV"),
-        ("SLAM stands for?", ["Simultaneous Localization and Mapping","Single Loc And Map","Source Local Area Map","None"], "Simultaneous Localization and Mapping"),
-        ("Which cloud provider is common?", ["AWS","Pandas","NumPy","Scikit"], "AWS"),
-        ("Which file format is common for data?", ["CSV","PNG","MP3","EXE"], "CSV"),
-        ("Which is used for experiment tracking?", ["Weights & Biases","VSCode","Excel","PowerPoint"], "Weights & Biases"),
-        ("Which is a deep learning framework?", ["TensorFlow","Excel","PowerPoint","Word"], "TensorFlow")
-    ]
-    # Program-specific seed Qs (first two)
-    program_qs = {
-        "AI": [("Which model family is from OpenAI?", ["GPT-4","BERT","ResNet","AlexNet"], "GPT-4")],
-        "ML": [("Which algorithm is best for classification?", ["Linear Regression","Logistic Regression","PCA","KNN"], "Logistic Regression")],
-        "Business Analytics": [("Which metric is KPI?", ["Key Performance Indicator","Key Program Interface","Kernel Process Input","None"], "Key Performance Indicator")],
-        "Data Analytics": [("Which SQL clause filters rows?", ["WHERE","GROUP BY","ORDER BY","HAVING"], "WHERE")],
-        "Robotics": [("Which sensor measures distance?", ["Lidar","Microphone","Thermometer","GPS"], "Lidar")],
-        "Digital Marketing":[("What is SEO?", ["Search Engine Optimization","Simple Email Output","Software Engineering Option","None"], "Search Engine Optimization")]
-    }
-    qs = []
-    # add program-specific if available
-    if program in program_qs:
-        qs.extend(program_qs[program])
-    # fill from base_mcq shuffled
-    shuffled = base_mcq.copy()
-    random.shuffle(shuffled)
-    for q in shuffled:
-        if len(qs) >= 20: break
-        qs.append(q)
-    # ensure length 20 (repeat if necessary)
-    while len(qs) < 20:
-        qs.append(random.choice(base_mcq))
-    return qs[:20]
+    store = get_photo_store()
+    if not is_ref(ref):
+        try:
+            ref = store.put(base64.b64decode(ref))
+        except ValueError:
+            return None
+        prof["photo"] = ref
+        get_storage().save_profile(st.session_state.username, prof)
+    return store.get(ref, size)
+
+@metrics.timed(metrics.QUIZ_GEN_SECONDS)
+def generate_daily_quiz(program, username, day):
+    # deterministic per (user, program, day): reruns and reconnects get the same 20 questions
+    return get_question_bank().daily_quiz(username or "guest", program, day, n=20)
 
 # ---------------- Sidebar (API key, profile quick) ----------------
 with st.sidebar:
@@ -163,6 +158,8 @@ with st.sidebar:
     api_key_input = st.text_input("Paste DeepSeek/OpenRouter API Key (optional)", type="password")
     base_url_input = st.text_input("Base URL", value=os.getenv("AI_BASE_URL","https://api.deepseek.com/v1"),
                                   help="DeepSeek default: https://api.deepseek.com/v1. Or use OpenRouter base if you have that.")
+    stream_input = st.toggle("Stream AI answers", value=True,
+                             help="Show tokens as they arrive instead of waiting for the full answer.")
     st.markdown("---")
     st.markdown("### 👤 Quick login (demo)")
     demo_user = st.selectbox("Choose demo user", options=["neel","soumy","vivek","student","new"])
@@ -185,11 +182,13 @@ def show_login():
         if st.button("Login"):
             u = username.strip().lower()
             p = password.strip()
-            # demo simple auth (mentor provided list)
-            demo_accounts = {"neel":"1234","soumy":"1111","vivek":"2222","student":"student"}
-            if u in demo_accounts and demo_accounts[u] == p:
+            auth = get_auth()
+            if auth.verify(u, p):
                 st.session_state.logged_in = True
                 st.session_state.username = u
+                # signed token in a cookie: a reload or a reconnect to another server process stays logged in
+                set_session_cookie(auth.create_session(u))
+                load_user_state(u)
                 st.success(f"Welcome {u.capitalize()}! 🚀")
                 time.sleep(0.6)
                 return
@@ -197,6 +196,340 @@ def show_login():
                 st.error("Incorrect username or password. Use demo accounts or Save profile then proceed.")
     st.markdown('</div>', unsafe_allow_html=True)
 
+# ---------------- Cached static content ----------------
+@st.cache_data
+def tools_markdown(program):
+    return "\n".join(f"- **{name}** — {why}" for name, why in AI_TOOLS.get(program, []))
+
+@st.cache_data
+def resources_markdown(program):
+    return "\n".join(f"- {r}" for r in RESOURCES.get(program, ["No resources yet."]))
+
+# ---------------- Fragments ----------------
+# Each interactive section is an st.fragment: widget changes inside it rerun only
+# that function instead of the whole script (CSS, every tab, profile card ...).
+
+@st.fragment
+@metrics.timed(metrics.FRAGMENT_SECONDS, fragment="quiz")
+def quiz_section():
+    st.subheader("📝 Daily 20 MCQ Quiz")
+    prog = st.selectbox("Select Program", PROGRAMS, index=0)
+    today = datetime.now().strftime('%Y-%m-%d')
+    today_key = f"{prog}|{today}"
+    # list of tuples (q,opts,correct), regenerated identically on every rerun
+    qs = generate_daily_quiz(prog, st.session_state.username, today)
+
+    # Render MCQs inside a form: radio clicks don't rerun anything until submit
+    with st.form(f"quiz_form_{today_key}"):
+        for i, (q, opts, correct) in enumerate(qs, start=1):
+            st.markdown(f"<div class='question-card'><b>{i}. {q}</b></div>", unsafe_allow_html=True)
+            # index=None: nothing preselected, so an untouched question grades as blank
+            st.radio(f"Answer {i}", options=opts, index=None, key=f"{today_key}_q{i}",
+                     label_visibility="collapsed")
+        submitted = st.form_submit_button("Submit Quiz")
+
+    if submitted:
+        # compute score: 5 points per correct MCQ, graded as one vectorized row
+        answers = [(q, st.session_state.get(f"{today_key}_q{i}")) for i, (q, _, _) in enumerate(qs, start=1)]
+        bank = get_question_bank()
+        qids, chosen = grading.encode_attempts(bank, [answers])
+        _, scores = grading.grade(qids, chosen, grading.answer_key(bank))
+        score = int(scores[0])
+        st.success(f"Score: {score} / {len(qs)*5}")
+        st.session_state.scores.append({"date": today, "program": prog, "total": score})
+        get_storage().add_quiz_attempt(st.session_state.username, prog, today, score, len(qs)*5, answers)
+        # only the best attempt per program and day counts towards the leaderboard
+        if not get_leaderboard().record(st.session_state.username, prog, today, score) and score:
+            st.info("Leaderboard unchanged: only your best attempt of the day counts.")
+        st.balloons()
+        # award badge if full marks
+        if score == len(qs)*5:
+            st.success("Perfect! You earned a Platinum Badge 🏆")
+
+def review_job_view():
+    # polled every second while a queued review is pending
+    status, txt, err = get_dispatcher().poll(st.session_state.review_job)
+    if status in ("queued", "running"):
+        st.info(f"⏳ Getting AI feedback... ({status})")
+        return
+    del st.session_state.review_job
+    st.session_state.review_result = (txt, err)
+    st.rerun()
+
+@st.fragment
+@metrics.timed(metrics.FRAGMENT_SECONDS, fragment="practice")
+def practice_section():
+    st.subheader("🖋 Practice Exercises")
+    prog_p = st.selectbox("Choose program for practice", PROGRAMS, index=0, key="practice_prog")
+    # hand-written exercises first, then today's sample from the generated bank
+    items = PRACTICE_BANK.get(prog_p, []) + get_question_bank().practice_prompts(
+        st.session_state.username, prog_p, datetime.now().strftime('%Y-%m-%d'))
+    items = items or ["Write one short note on your topic."]
+    for p_q in items:
+        st.markdown(f"- {p_q}")
+    st.markdown("You can write answers below and ask AI for feedback.")
+    practice_q = st.selectbox("Exercise you are answering", items, key="practice_q")
+    ans = st.text_area("Write your practice answer (2-5 lines)")
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Save Practice Locally"):
+            st.success("Saved locally for this session.")
+    with col2:
+        if st.button("Ask AI to Review Answer"):
+            if not api_key_input:
+                st.info("No API key. AI offline mode: quick tips -> Keep it concise, include examples.")
+            else:
+                prompts = [
+                    {"role":"system","content":REVIEW_SYSTEM},
+                    {"role":"user","content": f"Question: {practice_q}\nAnswer: {ans}"}
+                ]
+                if stream_input:
+                    get_dispatcher().acquire(api_key_input, base_url_input)  # same rate limit as queued calls
+                    gen, err = stream_ai_chat(prompts, api_key_input, base_url_input)
+                    if err:
+                        st.error(err)
+                    else:
+                        st.write_stream(gen)
+                        if gen.error:
+                            st.error(gen.error)
+                else:
+                    st.session_state.review_job = get_dispatcher().submit(prompts, api_key_input, base_url_input)
+    if st.session_state.get("review_job"):
+        st.fragment(review_job_view, run_every=1.0)()
+    result = st.session_state.pop("review_result", None)
+    if result:
+        txt, err = result
+        if err:
+            st.error(err)
+        else:
+            st.write(txt)
+
+def summarize_with_ai(api_key, base_url):
+    # summarizer for ConversationStore.maybe_summarize; raises so the store falls back to extractive
+    # goes through the dispatcher, so summaries share the per-key rate limit with answers
+    dispatcher = get_dispatcher()  # resolved on the script thread; summarize runs on a worker
+    def summarize(previous, turns):
+        transcript = "\n".join(f"{'Student' if r == 'user' else 'Tutor'}: {c}" for r, c in turns)
+        msgs = [{"role":"system","content":"Summarize this tutoring conversation in under 120 words. "
+                 "Keep key definitions, examples and anything the student is still unsure about."},
+                {"role":"user","content":f"Earlier summary:\n{previous or '(none)'}\n\nNew turns:\n{transcript}"}]
+        status, txt, err = dispatcher.wait(dispatcher.submit(msgs, api_key, base_url), timeout=120)
+        if status != "done" or err:
+            raise RuntimeError(err or f"summary {status}")
+        return txt
+    return summarize
+
+def finish_tutor_answer(system_prompt, user_q, prog, txt, err, cacheable=False, thread_id=None):
+    if err:
+        # fallback offline helpful answer
+        st.error(err)
+        st.info("Offline tip: Break the topic into definitions, steps, and one example.")
+        return
+    if cacheable:
+        # only answers to a thread's opening question; follow-ups depend on the earlier turns
+        get_response_cache().put(system_prompt, user_q, txt)
+    # save history
+    ts = datetime.now().isoformat()
+    st.session_state.chat_history.append({"q":user_q,"a":txt,"ts":ts})
+    get_storage().add_chat_turn(st.session_state.username, prog, user_q, txt, ts)
+    if thread_id is not None:
+        conv = get_conversations()
+        conv.add_exchange(thread_id, user_q, txt)
+        # folding old turns into the summary may call the AI; keep it off the script thread
+        summarizer = summarize_with_ai(api_key_input, base_url_input) if api_key_input else None
+        threading.Thread(target=conv.maybe_summarize, args=(thread_id, summarizer), daemon=True).start()
+
+def tutor_job_view():
+    # polled every second while a queued tutor question is pending
+    job = st.session_state.tutor_job
+    status, txt, err = get_dispatcher().poll(job["id"])
+    if status in ("queued", "running"):
+        st.info(f"⏳ AI is thinking... ({status})")
+        return
+    del st.session_state.tutor_job
+    if not err:
+        finish_tutor_answer(job["system"], job["q"], job["prog"], txt, None, job["cacheable"], job["thread"])
+    st.session_state.tutor_result = (txt, err)
+    st.rerun()  # full rerun stops the poller and shows the answer + history
+
+@st.fragment
+@metrics.timed(metrics.FRAGMENT_SECONDS, fragment="tutor")
+def tutor_section():
+    st.subheader("🤖 AI Tutor — Ask any study question")
+    prog_ai = st.selectbox("Program context (helps AI tailor)", PROGRAMS, index=0, key="ai_prog")
+    level_ai = st.selectbox("Student Level", ["Beginner","Intermediate","Advanced"], index=0)
+    conv = get_conversations()
+    thread_id = conv.active_thread(st.session_state.username, prog_ai)
+    turns = conv.turn_count(thread_id)
+    c1, c2 = st.columns([3,1])
+    c1.caption(f"🧵 Conversation: {turns // 2} exchange(s) in this {prog_ai} thread" if turns
+               else "🧵 New conversation — follow-up questions keep the context")
+    if c2.button("New conversation", disabled=not turns):
+        conv.new_thread(st.session_state.username, prog_ai)
+        st.rerun()
+    user_q = st.text_area("Type your question (be specific for best results)", height=120)
+    if st.button("Ask AI"):
+        if not user_q.strip():
+            st.warning("Please write a question first.")
+        else:
+            system_prompt = (f"You are an expert tutor in {prog_ai}. Answer for a {level_ai} student. "
+                             "Give: 1) short explanation, 2) one example, 3) small code snippet if helpful, "
+                             "4) two study resources. Keep it concise.")
+            # earlier turns (or their summary) within the token budget, then the new question
+            msgs = conv.build_messages(thread_id, system_prompt, user_q)
+            cache = get_response_cache()
+            # follow-ups depend on the thread, so only opening questions are served from cache
+            cached = cache.get(system_prompt, user_q) if not turns else None
+            if cached is not None:
+                txt, err = cached, None
+                st.markdown("**AI Answer:**")
+                st.write(txt)
+                st.caption("⚡ Answered from cache")
+            elif stream_input:
+                get_dispatcher().acquire(api_key_input, base_url_input)  # same rate limit as queued calls
+                gen, err = stream_ai_chat(msgs, api_key_input, base_url_input)
+                txt = None
+                if not err:
+                    st.markdown("**AI Answer:**")
+                    # write_stream renders tokens as they arrive and returns the full text
+                    txt = st.write_stream(gen)
+                    if gen.error:
+                        # partial answer: shown, but not cached or saved to the thread
+                        txt, err = None, gen.error
+            else:
+                # queued: the script thread returns at once and a fragment polls for the answer
+                job_id = get_dispatcher().submit(msgs, api_key_input, base_url_input)
+                st.session_state.tutor_job = {"id": job_id, "system": system_prompt, "q": user_q, "prog": prog_ai,
+                                              "thread": thread_id, "cacheable": not turns}
+                txt = err = None
+            if txt is not None or err:
+                finish_tutor_answer(system_prompt, user_q, prog_ai, txt, err, cached is None and not turns, thread_id)
+    if st.session_state.get("tutor_job"):
+        st.fragment(tutor_job_view, run_every=1.0)()
+    result = st.session_state.pop("tutor_result", None)
+    if result:
+        txt, err = result
+        if err:
+            st.error(err)
+            st.info("Offline tip: Break the topic into definitions, steps, and one example.")
+        else:
+            st.markdown("**AI Answer:**")
+            st.write(txt)
+    # show recent history
+    if st.session_state.chat_history:
+        st.markdown("**Recent Questions**")
+        for item in st.session_state.chat_history[-6:]:
+            st.markdown(f"- **Q:** {item['q']}  \n  **A:** {item['a'][:500]}...")
+
+@st.fragment
+@metrics.timed(metrics.FRAGMENT_SECONDS, fragment="tools")
+def tools_section():
+    st.subheader("🧰 AI Tools by Program")
+    prog_tool = st.selectbox("Select Program", PROGRAMS, index=0, key="tools_prog")
+    st.markdown("**Recommended tools & why**")
+    st.markdown(tools_markdown(prog_tool))
+
+@st.fragment
+@metrics.timed(metrics.FRAGMENT_SECONDS, fragment="resources")
+def resources_section():
+    st.subheader("📚 Resources")
+    p = st.selectbox("Choose program", PROGRAMS, index=0, key="res_prog")
+    st.markdown(resources_markdown(p))
+
+@st.fragment
+@metrics.timed(metrics.FRAGMENT_SECONDS, fragment="leaderboard")
+def leaderboard_section():
+    st.subheader("🏆 Leaderboard")
+    lb = get_leaderboard()
+    c1, c2 = st.columns(2)
+    with c1:
+        window = st.selectbox("Window", ["All time", "Today", "This week", "Program"], key="lb_window")
+    with c2:
+        lb_prog = st.selectbox("Program", PROGRAMS, index=0, key="lb_prog", disabled=window != "Program")
+    b_all, b_day, b_week, b_prog = boards_for(lb_prog, datetime.now().date())
+    board = {"All time": b_all, "Today": b_day, "This week": b_week, "Program": b_prog}[window]
+    n_users = lb.size(board)
+    page_size = 10
+    n_pages = max(1, (n_users + page_size - 1) // page_size)
+    page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1, key="lb_page")
+    with metrics.timer(metrics.LEADERBOARD_SECONDS):
+        rows = lb.page(board, page - 1, page_size)
+        my_rank, my_pts = lb.rank_of(board, st.session_state.username)
+    if rows:
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+    else:
+        st.info("No quiz results yet for this window — be the first!")
+    if my_rank:
+        st.caption(f"Your rank: #{my_rank} of {n_users} • {my_pts} pts")
+
+@st.fragment
+def admin_section():
+    st.subheader("📈 Hot-path metrics (this process)")
+    if st.button("Refresh metrics"):
+        pass  # button click reruns only this fragment
+    rows = []
+    for h in (metrics.RERUN_SECONDS, metrics.FRAGMENT_SECONDS, metrics.AI_REQUEST_SECONDS,
+              metrics.AI_TTFB_SECONDS, metrics.QUIZ_GEN_SECONDS, metrics.LEADERBOARD_SECONDS):
+        for labels, (count, total) in sorted(h.summary().items()):
+            rows.append({"Metric": h.name, "Labels": ",".join(labels), "Count": count,
+                         "Avg ms": round(total / count * 1000, 2) if count else 0.0})
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+    sizes = metrics.SESSION_STATE_BYTES.summary().get((), (0, 0))
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Avg session_state", f"{sizes[1] / sizes[0] / 1024:.1f} KB" if sizes[0] else "—")
+    c2.metric("AI cache hit rate", f"{get_response_cache().stats()['hit_rate']:.0%}")
+    c3.metric("Coalesced AI jobs", get_dispatcher().stats()["coalesced"])
+    st.caption("AI calls by outcome: " + ", ".join(f"{l} {v}" for _, l, v in metrics.AI_REQUESTS.samples()))
+    with st.expander("Prometheus exposition"):
+        st.code(metrics.render_prometheus(), language="text")
+
+def bulk_review_job_view():
+    # polled every second while bulk review batches are out
+    review = st.session_state.bulk_review_job
+    if not review.step():
+        graded = sum(h in review.done for h in review.unique)
+        st.progress(graded / len(review.unique), text=f"⏳ Grading... {graded}/{len(review.unique)} answers")
+        return
+    del st.session_state.bulk_review_job
+    st.session_state.bulk_review = review.results()
+    st.rerun()
+
+@st.fragment
+@metrics.timed(metrics.FRAGMENT_SECONDS, fragment="bulk_review")
+def bulk_review_section():
+    st.subheader("🗂 Bulk practice review")
+    st.caption("Upload a CSV/JSONL with student, question, answer. Answers graded before are reused.")
+    up = st.file_uploader("Practice answers", type=["csv","jsonl"], key="bulk_review_file")
+    if up is not None and st.button("Grade all answers"):
+        if not api_key_input:
+            st.info("Bulk review needs an API key (sidebar).")
+            return
+        rows = load_submissions(up.name, up.getvalue())
+        if not rows:
+            st.warning("No rows with a question and an answer found.")
+            return
+        # batches go through the shared dispatcher, so they share its rate limit with tutor jobs;
+        # the script thread returns at once and a fragment polls for the results
+        st.session_state.pop("bulk_review", None)
+        st.session_state.bulk_review_job = BulkReview(rows, get_dispatcher(), api_key_input, base_url_input,
+                                                      store=get_review_store(), log=lambda msg: None)
+    if st.session_state.get("bulk_review_job"):
+        st.fragment(bulk_review_job_view, run_every=1.0)()
+    if st.session_state.get("bulk_review"):
+        results, stats = st.session_state.bulk_review
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Answers", stats["rows"])
+        c2.metric("From cache", stats["cached"])
+        c3.metric("AI requests", stats["requests"])
+        if stats["failed"]:
+            st.warning(f"{stats['failed']} answers could not be graded; run again to retry only those.")
+        st.dataframe(results, use_container_width=True, hide_index=True)
+        out = io.StringIO()
+        w = csv.DictWriter(out, fieldnames=list(results[0]))
+        w.writeheader()
+        w.writerows(results)
+        st.download_button("Download results (CSV)", out.getvalue(), file_name="reviewed.csv", mime="text/csv")
+
 # ---------------- Main Dashboard / App UI ----------------
 def show_dashboard():
     st.markdown('<div class="header-card"><h2 class="h2">Welcome back — Learn with AI, quizzes & projects</h2></div>', unsafe_allow_html=True)
@@ -205,7 +538,8 @@ def show_dashboard():
     with k1:
         st.markdown('<div class="kpi"><h3>Daily Quiz</h3><div class="small">20 Q MCQ</div></div>', unsafe_allow_html=True)
     with k2:
-        total_pts = sum(item.get("total",0) for item in st.session_state.scores) if st.session_state.scores else 0
+        # same figure as the all-time leaderboard: best attempt per program and day
+        total_pts = get_leaderboard().rank_of("all", st.session_state.username)[1]
         st.markdown(f'<div class="kpi"><h3>{total_pts}</h3><div class="small">Total Points</div></div>', unsafe_allow_html=True)
     with k3:
         st.markdown('<div class="kpi"><h3>AI Tutor</h3><div class="small">Ask Doubts</div></div>', unsafe_allow_html=True)
@@ -213,9 +547,12 @@ def show_dashboard():
         st.markdown('<div class="kpi"><h3>Motivation</h3><div class="small">Daily Quote</div></div>', unsafe_allow_html=True)
 
     # Tabs
-    tab_dashboard, tab_quiz, tab_practice, tab_ai, tab_tools, tab_resources, tab_leader = st.tabs(
+    is_admin = st.session_state.username in ADMIN_USERS
+    tabs = st.tabs(
         ["🏠 Home", "📝 Daily Quiz", "🖋 Practice", "🤖 AI Tutor", "🧰 AI Tools", "📚 Resources", "🏆 Leaderboard"]
+        + (["📈 Admin"] if is_admin else [])
     )
+    tab_dashboard, tab_quiz, tab_practice, tab_ai, tab_tools, tab_resources, tab_leader = tabs[:7]
 
     # ---------- HOME ----------
     with tab_dashboard:
@@ -230,8 +567,9 @@ def show_dashboard():
         with col_right:
             # profile summary
             prof = st.session_state.profile
-            if prof.get("photo"):
-                st.image(BytesIO(base64.b64decode(prof["photo"])), width=140, output_format="auto")
+            thumb = profile_photo(prof)
+            if thumb:
+                st.image(thumb, width=140)
             else:
                 st.image("https://dummyimage.com/140x140/223/77a6ff&text=Profile", width=140)
             st.markdown(f"**{prof.get('name', st.session_state.username or '—')}**")
@@ -242,150 +580,47 @@ def show_dashboard():
     # ---------- DAILY QUIZ ----------
     with tab_quiz:
         st.markdown('<div class="card">', unsafe_allow_html=True)
-        st.subheader("📝 Daily 20 MCQ Quiz")
-        prog = st.selectbox("Select Program", PROGRAMS, index=0)
-        # ensure we store per-day quiz to prevent resubmit (demo local logic)
-        today_key = f"{prog}|{datetime.now().strftime('%Y-%m-%d')}"
-        if 'quiz_store' not in st.session_state:
-            st.session_state.quiz_store = {}
-        if today_key not in st.session_state.quiz_store:
-            qs = generate_daily_quiz(prog)
-            # Save structure: list of tuples (q,opts,correct)
-            st.session_state.quiz_store[today_key] = qs
-            st.session_state[f"answers_{today_key}"] = {}
-        qs = st.session_state.quiz_store[today_key]
-
-        # Render MCQs
-        answers_local = {}
-        for i, (q, opts, correct) in enumerate(qs, start=1):
-            st.markdown(f"<div class='question-card'><b>{i}. {q}</b></div>", unsafe_allow_html=True)
-            choice = st.radio("", options=opts, key=f"{today_key}_q{i}")
-            answers_local[f"q{i}"] = choice
-
-        if st.button("Submit Quiz"):
-            # compute score
-            score = 0
-            for i, (q, opts, correct) in enumerate(qs, start=1):
-                chosen = st.session_state.get(f"{today_key}_q{i}")
-                if chosen == correct:
-                    score += 5  # 5 points per correct MCQ
-            st.success(f"Score: {score} / {len(qs)*5}")
-            st.session_state.scores.append({"date": datetime.now().strftime("%Y-%m-%d"),
-                                           "program": prog, "total": score})
-            st.balloons()
-            # award badge if full marks
-            if score == len(qs)*5:
-                st.success("Perfect! You earned a Platinum Badge 🏆")
-
+        quiz_section()
         st.markdown('</div>', unsafe_allow_html=True)
 
     # ---------- PRACTICE ----------
     with tab_practice:
         st.markdown('<div class="card">', unsafe_allow_html=True)
-        st.subheader("🖋 Practice Exercises")
-        prog_p = st.selectbox("Choose program for practice", PROGRAMS, index=0, key="practice_prog")
-        practice_bank = {
-            "AI":[ "Explain difference between AI & ML (2 lines).", "List 3 AI applications."],
-            "ML":[ "Write steps to split dataset for train/val/test.", "Explain bias vs variance."],
-            "Robotics":[ "Describe PID controller in 2 lines.", "What is SLAM?" ],
-            "Business Analytics":[ "List five KPIs for an e-commerce store.", "Sketch a dashboard layout for sales."],
-            "Data Analytics":[ "Write a SQL query to get top 5 customers by revenue.", "Explain ETL pipeline." ]
-        }
-        items = practice_bank.get(prog_p, ["Write one short note on your topic."])
-        for p_q in items:
-            st.markdown(f"- {p_q}")
-        st.markdown("You can write answers below and ask AI for feedback.")
-        ans = st.text_area("Write your practice answer (2-5 lines)")
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("Save Practice Locally"):
-                st.success("Saved locally for this session.")
-        with col2:
-            if st.button("Ask AI to Review Answer"):
-                if not api_key_input:
-                    st.info("No API key. AI offline mode: quick tips -> Keep it concise, include examples.")
-                else:
-                    prompts = [
-                        {"role":"system","content":"You are a friendly tutor who grades short answers 0-10 and gives 2 improvements."},
-                        {"role":"user","content": f"Question: {items[0]}\nAnswer: {ans}"}
-                    ]
-                    with st.spinner("Getting AI feedback..."):
-                        txt, err = call_ai_chat(prompts, api_key_input, base_url_input)
-                        if err:
-                            st.error(err)
-                        else:
-                            st.write(txt)
+        practice_section()
         st.markdown('</div>', unsafe_allow_html=True)
 
     # ---------- AI TUTOR ----------
     with tab_ai:
         st.markdown('<div class="card">', unsafe_allow_html=True)
-        st.subheader("🤖 AI Tutor — Ask any study question")
-        prog_ai = st.selectbox("Program context (helps AI tailor)", PROGRAMS, index=0, key="ai_prog")
-        level_ai = st.selectbox("Student Level", ["Beginner","Intermediate","Advanced"], index=0)
-        user_q = st.text_area("Type your question (be specific for best results)", height=120)
-        if st.button("Ask AI"):
-            if not user_q.strip():
-                st.warning("Please write a question first.")
-            else:
-                system_prompt = (f"You are an expert tutor in {prog_ai}. Answer for a {level_ai} student. "
-                                 "Give: 1) short explanation, 2) one example, 3) small code snippet if helpful, "
-                                 "4) two study resources. Keep it concise.")
-                msgs = [{"role":"system","content":system_prompt},
-                        {"role":"user","content":user_q}]
-                with st.spinner("AI is thinking..."):
-                    txt, err = call_ai_chat(msgs, api_key_input, base_url_input)
-                    if err:
-                        # fallback offline helpful answer
-                        st.error(err)
-                        st.info("Offline tip: Break the topic into definitions, steps, and one example.")
-                    else:
-                        st.markdown("**AI Answer:**")
-                        st.write(txt)
-                        # save history
-                        st.session_state.chat_history.append({"q":user_q,"a":txt,"ts":datetime.now().isoformat()})
-        # show recent history
-        if st.session_state.chat_history:
-            st.markdown("**Recent Questions**")
-            for item in st.session_state.chat_history[-6:]:
-                st.markdown(f"- **Q:** {item['q']}  \n  **A:** {item['a'][:500]}...")
-
+        tutor_section()
         st.markdown('</div>', unsafe_allow_html=True)
 
     # ---------- AI TOOLS ----------
     with tab_tools:
         st.markdown('<div class="card">', unsafe_allow_html=True)
-        st.subheader("🧰 AI Tools by Program")
-        prog_tool = st.selectbox("Select Program", PROGRAMS, index=0, key="tools_prog")
-        st.markdown("**Recommended tools & why**")
-        for name, why in AI_TOOLS.get(prog_tool, []):
-            st.markdown(f"- **{name}** — {why}")
+        tools_section()
         st.markdown('</div>', unsafe_allow_html=True)
 
     # ---------- RESOURCES ----------
     with tab_resources:
         st.markdown('<div class="card">', unsafe_allow_html=True)
-        st.subheader("📚 Resources")
-        p = st.selectbox("Choose program", PROGRAMS, index=0, key="res_prog")
-        for r in RESOURCES.get(p, ["No resources yet."]):
-            st.markdown(f"- {r}")
+        resources_section()
         st.markdown('</div>', unsafe_allow_html=True)
 
     # ---------- LEADERBOARD ----------
     with tab_leader:
         st.markdown('<div class="card">', unsafe_allow_html=True)
-        st.subheader("🏆 Leaderboard (demo)")
-        # demo leaderboard: combine demo names + session points
-        demo_names = ["Soumya","Vivek","Satyam","Alyssa","Rohit","Arman"]
-        demo_pts = list(np.random.randint(200,800,len(demo_names)))
-        # add current user points
-        my_pts = sum(s.get("total",0) for s in st.session_state.scores)
-        demo_names.append(st.session_state.username.capitalize() if st.session_state.username else "You")
-        demo_pts.append(my_pts)
-        df = pd.DataFrame({"Name": demo_names, "Points": demo_pts}).sort_values("Points", ascending=False).reset_index(drop=True)
-        st.dataframe(df, use_container_width=True)
+        leaderboard_section()
         st.markdown('</div>', unsafe_allow_html=True)
 
+    # ---------- ADMIN ----------
+    if is_admin:
+        with tabs[7]:
+            st.markdown('<div class="card">', unsafe_allow_html=True)
+            admin_section()
+            bulk_review_section()
+            st.markdown('</div>', unsafe_allow_html=True)
+
 # ---------------- Profile Editor ----------------
 def show_profile_editor():
     st.markdown('<div class="card">', unsafe_allow_html=True)
@@ -397,37 +632,94 @@ def show_profile_editor():
     fav_food = st.text_input("Favorite food", value=st.session_state.profile.get("fav_food",""))
     interests = st.text_area("Interests (comma separated)", value=st.session_state.profile.get("interests",""))
     photo = st.file_uploader("Upload photo (png/jpg)", type=["png","jpg","jpeg"])
-    if photo:
-        b64 = base64.b64encode(photo.read()).decode('utf-8')
-        st.session_state.profile["photo"] = b64
+    # the uploader keeps returning the same file on every rerun; process each upload once
+    if photo and st.session_state.get("photo_upload_id") != photo.file_id:
+        st.session_state.photo_upload_id = photo.file_id
+        try:
+            st.session_state.profile["photo"] = get_photo_store().put(photo.getvalue())
+            get_storage().save_profile(st.session_state.username, st.session_state.profile)
+        except ValueError as e:
+            st.error(str(e))
     if st.button("Save Profile"):
         st.session_state.profile.update({
             "name": name, "program": program, "year": year, "fav_song": fav_song,
             "fav_food": fav_food, "interests": interests
         })
+        get_storage().save_profile(st.session_state.username, st.session_state.profile)
         st.success("Profile saved ✅")
     st.markdown('</div>', unsafe_allow_html=True)
 
+def set_session_cookie(token):
+    # st.context.cookies can only read; the browser stores the cookie from a one-off script
+    st.session_state.session_token = token
+    st.session_state._cookie_out = token
+
+def write_session_cookie():
+    token = st.session_state.pop("_cookie_out", None)
+    if token is None:
+        return
+    max_age = get_auth().ttl if token else 0  # "" clears the cookie
+    cookie = json.dumps(f"{SESSION_COOKIE}={token}; Max-Age={max_age}; Path=/; SameSite=Strict")
+    st.html(f"<script>document.cookie = {cookie} + (location.protocol === 'https:' ? '; Secure' : '');</script>",
+            unsafe_allow_javascript=True)
+
+def restore_session():
+    # new browser session (reload, reconnect, other process): log back in from the cookie, once
+    if st.session_state.get("_cookie_checked"):
+        return
+    st.session_state._cookie_checked = True
+    token = st.context.cookies.get(SESSION_COOKIE)
+    if not token:
+        return
+    username, new_token = get_auth().rotate(token)
+    if username:
+        st.session_state.logged_in = True
+        st.session_state.username = username
+        set_session_cookie(new_token)
+        load_user_state(username)
+    # otherwise leave the cookie alone: the token may have lost a race with another tab
+    # reloading at the same moment, and clearing it would delete that tab's fresh cookie
+
 # ---------------- Entry point ----------------
-st.sidebar.markdown("## Navigation")
-if not st.session_state.logged_in:
-    show_login()
-    st.sidebar.markdown("---")
-    st.sidebar.info("Demo users: neel/1234, soumy/1111, vivek/2222, student/student")
-else:
-    # allow editing profile via sidebar quick link
-    if st.sidebar.button("Edit Profile"):
-        show_profile_editor()
-    if st.sidebar.button("Home / Dashboard"):
-        show_dashboard()
+with metrics.maybe_profile():
+    if not st.session_state.logged_in:
+        restore_session()
+    st.sidebar.markdown("## Navigation")
+    if not st.session_state.logged_in:
+        show_login()
+        if SEED_DEMO_USERS:  # only advertise accounts that actually exist
+            st.sidebar.markdown("---")
+            st.sidebar.info("Demo users: " + ", ".join(f"{u}/{p}" for u, p in DEMO_ACCOUNTS.items()))
     else:
-        show_dashboard()
-    st.sidebar.markdown("---")
-    if st.sidebar.button("Logout"):
-        st.session_state.logged_in = False
-        st.session_state.username = ""
-        st.experimental_rerun()
+        # allow editing profile via sidebar quick link
+        if st.sidebar.button("Edit Profile"):
+            show_profile_editor()
+        if st.sidebar.button("Home / Dashboard"):
+            show_dashboard()
+        else:
+            show_dashboard()
+        st.sidebar.markdown("---")
+        if st.sidebar.button("Logout"):
+            get_auth().revoke(st.session_state.get("session_token", ""))
+            set_session_cookie("")
+            st.session_state.logged_in = False
+            st.session_state.username = ""
+            st.session_state.profile = {}
+            st.session_state.scores = []
+            st.session_state.chat_history = []
+            st.rerun()
+
+    write_session_cookie()
 
 # footer
 st.markdown("<hr>", unsafe_allow_html=True)
-st.markdown("<div class='small'>Pro AI Learning Platform — built for hackathons. Add real DB and hosting later for persistence.</div>", unsafe_allow_html=True)
+st.markdown("<div class='small'>Pro AI Learning Platform — built for hackathons. Data persisted in SQLite (APP_DATA_DIR).</div>", unsafe_allow_html=True)
+
+# rerun instrumentation
+metrics.RERUN_SECONDS.observe(time.perf_counter() - _rerun_t0)
+st.session_state._rerun_n = st.session_state.get("_rerun_n", 0) + 1
+if st.session_state._rerun_n % SESSION_SIZE_EVERY == 1:
+    try:
+        metrics.SESSION_STATE_BYTES.observe(len(pickle.dumps(st.session_state.to_dict())))
+    except Exception:
+        pass  # unpicklable widget values; skip this sample
@@ -0,0 +1,17 @@
+# App configuration from the environment, read once per process
+
+import os
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.getenv("APP_DATA_DIR", os.path.join(HERE, "data"))
+BANK_DIR = os.getenv("QUESTION_BANK_DIR", os.path.join(HERE, "banks"))
+DB_PATH = os.getenv("APP_DB_PATH", os.path.join(DATA_DIR, "platform.sqlite3"))
+# no admin by default; the accounts in ADMIN_USERS get ADMIN_PASSWORD when it is set
+ADMIN_USERS = {u.strip() for u in os.getenv("ADMIN_USERS", "").split(",") if u.strip()}
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "")
+SESSION_SIZE_EVERY = 25  # pickle session_state on every Nth rerun per session
+# memory:// | sqlite:///path | redis://host:6379/0 (see sessions.py)
+SESSION_STORE = os.getenv("SESSION_STORE", "sqlite://" + os.path.join(DATA_DIR, "sessions.sqlite3"))
+SESSION_COOKIE = "lp_session"  # browser cookie holding the signed session token
+SESSION_SECRET = os.getenv("SESSION_SECRET")  # unset: generated once and shared through the store
+SEED_DEMO_USERS = os.getenv("SEED_DEMO_USERS", "1") == "1"
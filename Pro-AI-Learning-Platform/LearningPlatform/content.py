@@ -0,0 +1,64 @@
+# Static catalogue data shared by the app and the offline tools (no Streamlit import)
+# Imported once per process instead of being rebuilt on every script rerun
+
+PROGRAMS = [
+    "AI","ML","Business Analytics","BBA","Data Analytics","Robotics",
+    "Biotechnology","Agriculture","Law","Hospital Management","Digital Marketing"
+]
+
+# demo logins, seeded (hashed) into the auth store on first start
+DEMO_ACCOUNTS = {"neel":"1234","soumy":"1111","vivek":"2222","student":"student"}
+
+# topics the offline bank generator fans out over (program x topic x difficulty)
+PROGRAM_TOPICS = {
+    "AI": ["search", "knowledge representation", "models", "ethics", "nlp", "computer vision"],
+    "ML": ["classification", "regression", "evaluation", "features", "clustering", "model selection"],
+    "Business Analytics": ["kpi", "forecasting", "dashboards", "a/b testing", "descriptive statistics"],
+    "BBA": ["finance", "marketing", "accounting", "management", "economics"],
+    "Data Analytics": ["sql", "pandas", "data cleaning", "visualization", "etl"],
+    "Robotics": ["sensors", "control", "kinematics", "ros", "slam"],
+    "Biotechnology": ["genetics", "tools", "molecular biology", "bioinformatics", "bioprocess"],
+    "Agriculture": ["soil", "tech", "crop science", "irrigation", "remote sensing"],
+    "Law": ["basics", "contracts", "torts", "constitutional law", "intellectual property"],
+    "Hospital Management": ["records", "operations", "quality", "healthcare finance", "staffing"],
+    "Digital Marketing": ["seo", "ads", "social media", "email marketing", "analytics"],
+}
+
+DIFFICULTIES = (1, 2, 3)
+
+AI_TOOLS = {
+    "AI": [("GPT/DeepSeek","Explanation & code"), ("Kaggle","Datasets & notebooks"), ("Colab","Free notebooks")],
+    "ML": [("Scikit-learn","Classical ML"), ("TensorFlow","Deep Learning"), ("Weights & Biases","Experiment tracking")],
+    "Business Analytics": [("Power BI","Dashboards"), ("Tableau","Viz"), ("Excel","Reporting")],
+    "BBA": [("Excel","Finance models"), ("Notion","Notes"), ("Grammarly","Writing")],
+    "Data Analytics": [("Pandas","Data manipulation"), ("SQL","Queries"), ("Plotly","Interactive charts")],
+    "Robotics": [("ROS/ROS2","Middleware"), ("Gazebo","Simulation"), ("OpenCV","Vision")],
+    "Biotechnology": [("Biopython","Bioinformatics"), ("NCBI/PubMed","Research"), ("BLAST","Sequence search")],
+    "Agriculture": [("GIS/QGIS","Mapping"), ("Remote sensing","Crop monitoring")],
+    "Law": [("Legal search","Case lookup"), ("Citation tools","References")],
+    "Hospital Management": [("EMR/HIS","Records"), ("Power BI","Operations dashboards")],
+    "Digital Marketing": [("Google Analytics","Metrics"), ("Meta Ads","Ads optimization")]
+}
+
+RESOURCES = {
+    "AI":["fast.ai course","DeepLearning.AI nanodegree"],
+    "ML":["Hands-On ML book","Scikit-learn docs"],
+    "Business Analytics":["Power BI guide","Kaggle BA datasets"],
+    "Robotics":["ROS tutorials","Gazebo docs"],
+    "Data Analytics":["SQL tutorials","Pandas docs"]
+}
+
+PRACTICE_BANK = {
+    "AI":[ "Explain difference between AI & ML (2 lines).", "List 3 AI applications."],
+    "ML":[ "Write steps to split dataset for train/val/test.", "Explain bias vs variance."],
+    "Robotics":[ "Describe PID controller in 2 lines.", "What is SLAM?" ],
+    "Business Analytics":[ "List five KPIs for an e-commerce store.", "Sketch a dashboard layout for sales."],
+    "Data Analytics":[ "Write a SQL query to get top 5 customers by revenue.", "Explain ETL pipeline." ]
+}
+
+MOTIVATION = [
+    "Small progress each day adds up to big results.",
+    "Consistency > intensity — show up daily.",
+    "Practice is how expertise is built.",
+    "Mistakes are proof that you are trying."
+]
@@ -0,0 +1,189 @@
+# Multi-turn AI Tutor threads with a token-budgeted context window
+# Threads (one active per user + program) and their turns live in SQLite next to the
+# rest of the app data. Each turn's token count is computed once on insert and stored,
+# so building a prompt is a sum over cached integers, not a re-tokenization of history.
+# Context = system prompt [+ running summary of older turns] + newest turns that fit
+# the budget + the new question. Turns that fall out of the window are folded into
+# the summary every SUMMARIZE_EVERY tokens, so prompt size stays bounded.
+
+import functools
+import os
+import sqlite3
+import threading
+import time
+
+CONTEXT_BUDGET = int(os.getenv("TUTOR_CONTEXT_TOKENS", "3000"))
+SUMMARIZE_EVERY = int(os.getenv("TUTOR_SUMMARIZE_TOKENS", "1500"))  # unsummarized overflow that triggers a summary
+SUMMARY_MAX_CHARS = 1200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tutor_threads (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    program TEXT NOT NULL,
+    summary TEXT NOT NULL DEFAULT '',
+    summary_tokens INTEGER NOT NULL DEFAULT 0,
+    summarized_upto INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_threads_user_program ON tutor_threads(username, program, id);
+CREATE TABLE IF NOT EXISTS tutor_turns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    thread_id INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_turns_thread ON tutor_turns(thread_id, id);
+"""
+
+
+@functools.lru_cache(maxsize=1)
+def _encoder():
+    try:
+        import tiktoken  # optional, exact counts for OpenAI-style tokenizers
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+@functools.lru_cache(maxsize=4096)
+def count_tokens(text):
+    # cached: system prompts and repeated questions are counted once per process
+    enc = _encoder()
+    if enc is not None:
+        return len(enc.encode(text))
+    return max(1, (len(text) + 3) // 4)  # ~4 chars per token fallback
+
+
+def extractive_summary(previous, turns):
+    # offline summarizer: previous summary + first sentence of each folded turn
+    parts = [previous] if previous else []
+    for role, content in turns:
+        first = content.strip().split("\n")[0].split(". ")[0][:160]
+        parts.append(f"{'Student' if role == 'user' else 'Tutor'}: {first}")
+    text = "\n".join(parts)
+    if len(text) > SUMMARY_MAX_CHARS:
+        # drop the oldest lines first
+        text = text[-SUMMARY_MAX_CHARS:].split("\n", 1)[-1]
+    return text
+
+
+class ConversationStore:
+    def __init__(self, path, budget=CONTEXT_BUDGET, summarize_every=SUMMARIZE_EVERY):
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self.budget = budget
+        self.summarize_every = summarize_every
+        self._lock = threading.Lock()
+        self._summarizing = set()  # thread ids with a summary in progress in this process
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    # ---------------- threads ----------------
+    def active_thread(self, username, program):
+        with self._lock:
+            row = self.db.execute(
+                "SELECT id FROM tutor_threads WHERE username=? AND program=? ORDER BY id DESC LIMIT 1",
+                (username, program)).fetchone()
+        return row[0] if row else self.new_thread(username, program)
+
+    def new_thread(self, username, program):
+        now = time.time()
+        with self._lock, self.db:
+            cur = self.db.execute(
+                "INSERT INTO tutor_threads(username, program, created, updated) VALUES (?,?,?,?)",
+                (username, program, now, now))
+        return cur.lastrowid
+
+    def turn_count(self, thread_id):
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM tutor_turns WHERE thread_id=?", (thread_id,)).fetchone()[0]
+
+    def add_exchange(self, thread_id, question, answer):
+        now = time.time()
+        rows = [(thread_id, "user", question, count_tokens(question), now),
+                (thread_id, "assistant", answer, count_tokens(answer), now)]
+        with self._lock, self.db:
+            self.db.executemany(
+                "INSERT INTO tutor_turns(thread_id, role, content, tokens, created) VALUES (?,?,?,?,?)", rows)
+            self.db.execute("UPDATE tutor_threads SET updated=? WHERE id=?", (now, thread_id))
+
+    # ---------------- context window ----------------
+    def build_messages(self, thread_id, system_prompt, question):
+        # -> messages list whose estimated size stays within self.budget
+        with self._lock:
+            summary, summary_tokens, upto = self.db.execute(
+                "SELECT summary, summary_tokens, summarized_upto FROM tutor_threads WHERE id=?",
+                (thread_id,)).fetchone()
+            left = self.budget - count_tokens(system_prompt) - count_tokens(question) - summary_tokens
+            window = []
+            # newest first, stop at the budget or at turns already folded into the summary
+            for tid, role, content, tokens in self.db.execute(
+                    "SELECT id, role, content, tokens FROM tutor_turns WHERE thread_id=? AND id>? ORDER BY id DESC",
+                    (thread_id, upto)):
+                if tokens > left:
+                    break
+                left -= tokens
+                window.append({"role": role, "content": content})
+        window.reverse()
+        if window and window[0]["role"] == "assistant":
+            window.pop(0)  # never start mid-exchange
+        msgs = [{"role": "system", "content": system_prompt}]
+        if summary:
+            msgs.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+        return msgs + window + [{"role": "user", "content": question}]
+
+    def maybe_summarize(self, thread_id, summarize=None):
+        # fold turns that no longer fit the window into the running summary
+        # summarize(previous_summary, [(role, content), ...]) -> text; defaults to extractive
+        # One summary per thread at a time here; the compare-and-set below covers other processes.
+        with self._lock:
+            if thread_id in self._summarizing:
+                return False  # the next answer tries again
+            self._summarizing.add(thread_id)
+        try:
+            return self._summarize(thread_id, summarize or extractive_summary)
+        finally:
+            with self._lock:
+                self._summarizing.discard(thread_id)
+
+    def _summarize(self, thread_id, summarize):
+        with self._lock:
+            summary, summary_tokens, upto = self.db.execute(
+                "SELECT summary, summary_tokens, summarized_upto FROM tutor_threads WHERE id=?",
+                (thread_id,)).fetchone()
+            turns = self.db.execute(
+                "SELECT id, role, content, tokens FROM tutor_turns WHERE thread_id=? AND id>? ORDER BY id DESC",
+                (thread_id, upto)).fetchall()
+        keep = self.budget // 2  # recent turns always left verbatim
+        used, cut = 0, None
+        for i, (tid, role, content, tokens) in enumerate(turns):
+            used += tokens
+            if used > keep:
+                cut = i
+                break
+        if cut is None:
+            return False
+        old = list(reversed(turns[cut:]))
+        if old and old[-1][1] == "user":
+            old = old[:-1]  # keep the question together with its answer
+        if not old or sum(t[3] for t in old) < self.summarize_every:
+            return False
+        try:
+            new_summary = summarize(summary, [(role, content) for _, role, content, _ in old]) or summary
+        except Exception:
+            new_summary = extractive_summary(summary, [(role, content) for _, role, content, _ in old])
+        new_summary = new_summary[-SUMMARY_MAX_CHARS:]
+        with self._lock, self.db:
+            cur = self.db.execute(
+                "UPDATE tutor_threads SET summary=?, summary_tokens=?, summarized_upto=? "
+                "WHERE id=? AND summarized_upto=?",  # lost the race: keep the other summary
+                (new_summary, count_tokens(new_summary), old[-1][0], thread_id, upto))
+        return cur.rowcount > 0
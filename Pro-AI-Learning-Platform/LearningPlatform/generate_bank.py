@@ -0,0 +1,289 @@
+# Offline question-bank generation
+# Fans prompts out over PROGRAMS x topic x difficulty, sends them through the shared
+# AIDispatcher (bounded workers + token-bucket rate limit), validates the JSON each
+# answer contains and writes one versioned bank file banks/<name>.v<N>.jsonl that
+# QuestionBank.from_dir picks up (newest version wins) the next time the app starts.
+# A run over a subset of programs carries the other tasks' rows over from the previous version.
+#
+#   python generate_bank.py --api-key $KEY --per-task 8
+#   python generate_bank.py --base-url http://127.0.0.1:8765/v1 --api-key x   # bench/fake_chat_server.py
+#
+# Every finished task is appended to a checkpoint (fsync'd JSONL) before the next one
+# is recorded, so an interrupted run resumes where it stopped: rerun the same command.
+# Dedupe runs over the whole result at publish time: exact (normalized text hash) and
+# near-duplicate (word-shingle Jaccard via an inverted index), against itself and
+# against the other bank files.
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+from ai_client import DEFAULT_BASE_URL, DEFAULT_MODEL
+from ai_jobs import AIDispatcher
+from config import BANK_DIR, DATA_DIR
+from content import DIFFICULTIES, PROGRAM_TOPICS, PROGRAMS
+from question_bank import VERSIONED, QuestionBank, bank_files, normalize, rows_from_file
+
+LEVELS = {1: "beginner", 2: "intermediate", 3: "advanced"}
+MAX_ATTEMPTS = 3
+NEAR_DUP_THRESHOLD = 0.8
+
+SYSTEM_PROMPT = ("You write exam content for university students. Questions must be factually correct, "
+                 "unambiguous and self-contained, with exactly one correct option.")
+
+
+def build_prompt(program, topic, difficulty, n_mcq, n_practice):
+    return (f"Program: {program}\nTopic: {topic}\nLevel: {LEVELS[difficulty]}\n"
+            f"Write {n_mcq} multiple-choice questions with 4 options each and {n_practice} short practice "
+            "exercises (answerable in 2-5 lines).\n"
+            'Return only JSON: {"mcq": [{"question": "...", "options": ["...", "...", "...", "..."], '
+            '"answer": "<one of the options>"}], "practice": ["..."]}')
+
+
+# ---------------- validation ----------------
+def parse_payload(txt):
+    # model output -> dict; tolerates ```json fences and prose around the object
+    txt = (txt or "").strip()
+    start, end = txt.find("{"), txt.rfind("}")
+    if start < 0 or end <= start:
+        raise ValueError("no JSON object in response")
+    data = json.loads(txt[start:end + 1])
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    return data
+
+
+def clean_mcq(item):
+    # -> {"question", "options", "answer"} or None
+    if not isinstance(item, dict):
+        return None
+    q = " ".join(str(item.get("question") or "").split())
+    opts = [" ".join(str(o).split()) for o in item.get("options") or []]
+    ans = " ".join(str(item.get("answer") or "").split())
+    if re.fullmatch(r"[A-Da-d]", ans) and ans not in opts and len(opts) == 4:
+        ans = opts["abcd".index(ans.lower())]  # "answer": "B"
+    if not 12 <= len(q) <= 400 or len(opts) != 4 or not all(opts):
+        return None
+    if len({normalize(o) for o in opts}) != 4 or ans not in opts:
+        return None
+    return {"question": q, "options": opts, "answer": ans}
+
+
+def clean_practice(prompt):
+    p = " ".join(str(prompt or "").split())
+    return p if 12 <= len(p) <= 400 else None
+
+
+# ---------------- near-duplicate detection ----------------
+def shingles(text, k=3):
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= k:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+class NearDupIndex:
+    # inverted index shingle -> ids; only items sharing a shingle are compared
+    def __init__(self, threshold=NEAR_DUP_THRESHOLD):
+        self.threshold = threshold
+        self._exact = set()
+        self._sizes = []
+        self._postings = {}
+
+    def add_if_new(self, text):
+        # -> True if text was added, False if it duplicates something already indexed
+        h = hashlib.sha256(normalize(text).encode("utf-8")).digest()
+        if h in self._exact:
+            return False
+        sh = shingles(text)
+        overlap = {}
+        for s in sh:
+            for i in self._postings.get(s, ()):
+                overlap[i] = overlap.get(i, 0) + 1
+        for i, common in overlap.items():
+            if common / (len(sh) + self._sizes[i] - common) >= self.threshold:
+                return False
+        i = len(self._sizes)
+        self._exact.add(h)
+        self._sizes.append(len(sh))
+        for s in sh:
+            self._postings.setdefault(s, []).append(i)
+        return True
+
+
+# ---------------- checkpoint ----------------
+class Checkpoint:
+    def __init__(self, path, meta):
+        self.path = path
+        self.done = {}  # task key -> {"mcq": [...], "practice": [...]}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f if line.strip()]
+            if lines and lines[0].get("meta") != meta:
+                raise SystemExit(f"{path} was started with different settings; use --fresh to discard it")
+            for rec in lines[1:]:
+                self.done[tuple(rec["task"])] = rec
+        else:
+            self._append({"meta": meta})
+
+    def _append(self, rec):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record(self, task, mcq, practice):
+        rec = {"task": list(task), "mcq": mcq, "practice": practice}
+        self._append(rec)
+        self.done[tuple(task)] = rec
+
+
+# ---------------- pipeline ----------------
+def run_tasks(tasks, ckpt, dispatcher, args, log=print):
+    # submit every pending task up front; the dispatcher bounds concurrency and rate
+    def submit(task, attempt):
+        prompt = build_prompt(*task, args.per_task, args.practice_per_task)
+        if attempt:
+            prompt += f"\n(retry {attempt}: the previous answer was not valid JSON in the format above)"
+        msgs = [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": prompt}]
+        return dispatcher.submit(msgs, args.api_key, args.base_url, args.model)
+
+    pending = [(task, 0, submit(task, 0)) for task in tasks if task not in ckpt.done]
+    failed = []
+    while pending:
+        retry = []
+        for task, attempt, job_id in pending:
+            status, txt, err = dispatcher.wait(job_id)
+            try:
+                if err:
+                    raise ValueError(err)
+                data = parse_payload(txt)
+                mcq = [m for m in map(clean_mcq, data.get("mcq") or []) if m]
+                practice = [p for p in map(clean_practice, data.get("practice") or []) if p]
+                if not mcq and not practice:
+                    raise ValueError("no valid items")
+            except ValueError as e:
+                if attempt + 1 < MAX_ATTEMPTS:
+                    retry.append((task, attempt + 1, submit(task, attempt + 1)))
+                else:
+                    failed.append(task)
+                    log(f"  failed {task}: {e}")
+                continue
+            ckpt.record(task, mcq, practice)
+            log(f"  [{len(ckpt.done)}/{len(tasks)}] {task[0]} / {task[1]} / L{task[2]}: "
+                f"{len(mcq)} mcq, {len(practice)} practice")
+        pending = retry
+    return failed
+
+
+def assemble(tasks, ckpt, existing, previous=()):
+    # deterministic: task order, then item order, so a resumed run publishes the same bank
+    # previous: rows of the version being replaced; kept for tasks this run did not cover
+    mcq_index, practice_index = NearDupIndex(), NearDupIndex()
+    for q in existing.questions:
+        mcq_index.add_if_new(q)
+    for prompts in existing.practice.values():
+        for p in prompts:
+            practice_index.add_if_new(p)
+    covered = set(tasks)
+    rows = [r for r in previous if (r.get("program"), r.get("topic"), r.get("difficulty")) not in covered]
+    for r in rows:
+        (practice_index if r.get("kind") == "practice" else mcq_index).add_if_new(r.get("prompt") or r["question"])
+    dropped = 0
+    for task in tasks:
+        rec = ckpt.done.get(task)
+        if rec is None:
+            continue
+        program, topic, difficulty = task
+        for m in rec["mcq"]:
+            if mcq_index.add_if_new(m["question"]):
+                rows.append({"program": program, "topic": topic, "difficulty": difficulty, **m})
+            else:
+                dropped += 1
+        for p in rec["practice"]:
+            if practice_index.add_if_new(p):
+                rows.append({"kind": "practice", "program": program, "topic": topic,
+                             "difficulty": difficulty, "prompt": p})
+            else:
+                dropped += 1
+    return rows, dropped
+
+
+def next_version(bank_dir, name):
+    versions = [int(m["version"]) for m in map(VERSIONED.match, os.listdir(bank_dir))
+                if m is not None and m["name"] == name]
+    return max(versions, default=0) + 1
+
+
+def publish(rows, bank_dir, name):
+    path = os.path.join(bank_dir, f"{name}.v{next_version(bank_dir, name)}.jsonl")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)  # the app never sees a half-written bank
+    return path
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate quiz questions and practice exercises into a versioned bank.")
+    ap.add_argument("--api-key", default=os.getenv("AI_API_KEY", ""))
+    ap.add_argument("--base-url", default=os.getenv("AI_BASE_URL", DEFAULT_BASE_URL))
+    ap.add_argument("--model", default=DEFAULT_MODEL)
+    ap.add_argument("--programs", nargs="*", default=PROGRAMS)
+    ap.add_argument("--difficulties", nargs="*", type=int, default=list(DIFFICULTIES))
+    ap.add_argument("--per-task", type=int, default=8, help="MCQs requested per program/topic/difficulty")
+    ap.add_argument("--practice-per-task", type=int, default=2)
+    ap.add_argument("--workers", type=int, default=8, help="concurrent upstream requests")
+    ap.add_argument("--rate", type=float, default=2.0, help="requests/sec")
+    ap.add_argument("--burst", type=int, default=5)
+    ap.add_argument("--bank-dir", default=BANK_DIR)
+    ap.add_argument("--name", default="generated", help="bank name; output is <name>.v<N>.jsonl")
+    ap.add_argument("--checkpoint", default=None, help="default: data/bankgen/<name>.checkpoint.jsonl")
+    ap.add_argument("--fresh", action="store_true", help="discard an existing checkpoint")
+    args = ap.parse_args(argv)
+
+    unknown = [p for p in args.programs if p not in PROGRAM_TOPICS]
+    if unknown:
+        ap.error(f"unknown programs: {', '.join(unknown)}")
+    tasks = [(p, t, d) for p in args.programs for t in PROGRAM_TOPICS[p] for d in args.difficulties]
+    ckpt_path = args.checkpoint or os.path.join(DATA_DIR, "bankgen", f"{args.name}.checkpoint.jsonl")
+    if args.fresh and os.path.exists(ckpt_path):
+        os.remove(ckpt_path)
+    meta = {"model": args.model, "base_url": args.base_url.rstrip("/"), "per_task": args.per_task,
+            "practice_per_task": args.practice_per_task, "programs": args.programs,
+            "difficulties": args.difficulties}
+    ckpt = Checkpoint(ckpt_path, meta)
+    print(f"{len(tasks)} tasks, {len(ckpt.done)} already checkpointed in {ckpt_path}")
+
+    t0 = time.perf_counter()
+    dispatcher = AIDispatcher(workers=args.workers, rate=args.rate, burst=args.burst)
+    failed = run_tasks(tasks, ckpt, dispatcher, args)
+    stats = dispatcher.stats()
+    print(f"generation: {time.perf_counter() - t0:.1f}s, {stats['upstream_calls']} upstream calls")
+    if failed:
+        print(f"{len(failed)} tasks failed; rerun the same command to retry them (bank not published)")
+        return 1
+
+    # dedupe against every other bank; the previous version is carried over, not deduped against
+    existing, previous = QuestionBank(), []
+    for f in bank_files(args.bank_dir):
+        m = VERSIONED.match(os.path.basename(f))
+        if m is None or m["name"] != args.name:
+            existing.extend(rows_from_file(f))
+        else:
+            previous = rows_from_file(f)
+    rows, dropped = assemble(tasks, ckpt, existing, previous)
+    path = publish(rows, args.bank_dir, args.name)
+    os.remove(ckpt_path)
+    print(f"wrote {len(rows)} items ({dropped} duplicates dropped) -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
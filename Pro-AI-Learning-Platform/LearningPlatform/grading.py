@@ -0,0 +1,153 @@
+# Vectorized quiz grading and item analytics
+# Attempts are two int matrices of shape (n_attempts, n_questions):
+#   qids   - question-bank id per slot (-1 = unknown question)
+#   chosen - option index picked per slot (-1 = blank / option not in bank)
+# Every attempt is graded in one NumPy pass against bank.answer_idx, and per-question
+# difficulty, discrimination and distractor counts come from bincounts over the same arrays.
+#
+# Offline re-scoring CLI:
+#   python grading.py submissions.csv --bank banks --scores rescored.csv --items item_stats.csv
+#   python grading.py data/platform.sqlite3 --bank banks
+# Input rows need an "answers" column: JSON list of [question, chosen option] pairs
+# (what the app stores in quiz_attempts.answers). CSV, JSONL, Parquet or the app's SQLite db.
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+
+
+POINTS_PER_QUESTION = 5
+
+
+def encode_attempts(bank, attempts):
+    # attempts: list of [(question, chosen), ...] -> (qids, chosen) matrices, right-padded with -1
+    import numpy as np  # deferred: the app only needs it once a quiz is submitted
+
+    width = max((len(a) for a in attempts), default=0)
+    qids = np.full((len(attempts), width), -1, dtype=np.int32)
+    chosen = np.full((len(attempts), width), -1, dtype=np.int16)
+    for r, attempt in enumerate(attempts):
+        for c, (question, choice) in enumerate(attempt):
+            i = bank.id_of(question)
+            qids[r, c] = i
+            if i >= 0 and choice in bank.options[i]:
+                chosen[r, c] = bank.options[i].index(choice)
+    return qids, chosen
+
+
+def answer_key(bank):
+    import numpy as np
+
+    return np.frombuffer(bank.answer_idx, dtype=np.uint8).astype(np.int16)
+
+
+def grade(qids, chosen, key, points=POINTS_PER_QUESTION):
+    # boolean correctness matrix + per-attempt score
+    import numpy as np
+
+    valid = qids >= 0
+    correct = valid & (chosen == key[np.where(valid, qids, 0)])
+    return correct, correct.sum(axis=1) * points
+
+
+def item_stats(qids, chosen, correct, n_items, n_options=None, group_frac=0.27):
+    import numpy as np
+
+    valid = qids >= 0
+    flat_q = qids[valid]
+    seen = np.bincount(flat_q, minlength=n_items)
+    right = np.bincount(flat_q, weights=correct[valid], minlength=n_items)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p_value = right / seen  # difficulty: share answering correctly (NaN if never asked)
+
+    # discrimination: p(upper 27% by total) - p(lower 27%)
+    totals = correct.sum(axis=1)
+    order = np.argsort(totals, kind="stable")
+    g = max(1, int(round(len(order) * group_frac)))
+
+    def group_p(rows):
+        v = valid[rows]
+        q = qids[rows][v]
+        n = np.bincount(q, minlength=n_items)
+        k = np.bincount(q, weights=correct[rows][v], minlength=n_items)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return k / n
+
+    discrimination = group_p(order[-g:]) - group_p(order[:g]) if len(order) else np.full(n_items, np.nan)
+
+    # distractors: how often each option was picked per question (blank not counted)
+    n_options = n_options or int(chosen.max(initial=0)) + 1
+    picked = valid & (chosen >= 0)
+    counts = np.bincount(qids[picked].astype(np.int64) * n_options + chosen[picked],
+                         minlength=n_items * n_options).reshape(n_items, n_options)
+    return {"asked": seen, "p_value": p_value, "discrimination": discrimination, "option_counts": counts}
+
+
+# ---------------- CLI ----------------
+def _load_rows(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".sqlite3", ".sqlite", ".db"):
+        db = sqlite3.connect(path)
+        db.row_factory = sqlite3.Row
+        rows = [dict(r) for r in db.execute(
+            "SELECT id, username, program, day, score, answers FROM quiz_attempts WHERE answers IS NOT NULL")]
+        db.close()
+        return rows
+    if ext == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    if ext == ".parquet":
+        import pandas as pd
+
+        return pd.read_parquet(path).to_dict("records")
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def main(argv=None):
+    import numpy as np
+    from question_bank import QuestionBank
+
+    ap = argparse.ArgumentParser(description="Re-score quiz submissions and compute item statistics.")
+    ap.add_argument("submissions", help="CSV / JSONL / Parquet dump, or the app's SQLite database")
+    ap.add_argument("--bank", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "banks"))
+    ap.add_argument("--scores", default="rescored.csv", help="per-attempt output")
+    ap.add_argument("--items", default="item_stats.csv", help="per-question output")
+    args = ap.parse_args(argv)
+
+    bank = QuestionBank.from_dir(args.bank)
+    rows = _load_rows(args.submissions)
+    attempts = [a if isinstance(a, list) else json.loads(a or "[]") for a in (r.get("answers") for r in rows)]
+    qids, chosen = encode_attempts(bank, attempts)
+    correct, scores = grade(qids, chosen, answer_key(bank))
+    stats = item_stats(qids, chosen, correct, len(bank), max((len(o) for o in bank.options), default=1))
+
+    with open(args.scores, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["id", "username", "program", "day", "old_score", "new_score", "unknown_questions"])
+        lens = np.array([len(a) for a in attempts], dtype=np.int32).reshape(-1, 1)
+        unknown = ((qids < 0) & (np.arange(qids.shape[1]) < lens)).sum(axis=1)
+        for r, row in enumerate(rows):
+            w.writerow([row.get("id", r), row.get("username", ""), row.get("program", ""), row.get("day", ""),
+                        row.get("score", ""), int(scores[r]), int(unknown[r])])
+
+    with open(args.items, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        n_opt = stats["option_counts"].shape[1]
+        w.writerow(["id", "question", "answer", "asked", "p_value", "discrimination"]
+                   + [f"picked_{k}" for k in range(n_opt)])
+        for i in np.flatnonzero(stats["asked"]):
+            w.writerow([i, bank.questions[i], bank.answers[i], int(stats["asked"][i]),
+                        round(float(stats["p_value"][i]), 4), round(float(stats["discrimination"][i]), 4),
+                        *stats["option_counts"][i].tolist()])
+
+    changed = sum(1 for r, row in enumerate(rows) if str(row.get("score", "")) not in ("", str(int(scores[r]))))
+    print(f"graded {len(rows)} attempts, {changed} scores changed -> {args.scores}, {args.items}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+# Incrementally maintained leaderboard
+# Per-user running totals live in one SQLite table, one row per (board, user), where a
+# board is a window: "all", "day:2026-10-17", "week:2026-W42" or "program:AI".
+# "Submit Quiz" bumps every board the attempt falls into, so page views never scan
+# or sort quiz attempts. Only the best attempt per (user, program, day) counts: the
+# leaderboard_attempts key enforces it, and a better resubmission adds just the improvement.
+#   top-K / pages  -> walk the (board, points DESC) index
+#   rank-of-user   -> Fenwick tree over point values, O(log max_points)
+# Rank indexes are rebuilt every index_ttl seconds (so other processes' writes show up) on
+# a background thread with its own connection, then swapped in; page views never wait.
+
+import datetime as _dt
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leaderboard (
+    board TEXT NOT NULL,
+    username TEXT NOT NULL,
+    points INTEGER NOT NULL,
+    PRIMARY KEY (board, username)
+);
+CREATE INDEX IF NOT EXISTS ix_leaderboard_rank ON leaderboard(board, points DESC, username);
+CREATE TABLE IF NOT EXISTS leaderboard_attempts (
+    username TEXT NOT NULL,
+    program TEXT NOT NULL,
+    day TEXT NOT NULL,
+    best INTEGER NOT NULL,
+    PRIMARY KEY (username, program, day)
+);
+"""
+
+
+def boards_for(program, day):
+    # every window a single quiz attempt counts towards
+    d = _dt.date.fromisoformat(day) if isinstance(day, str) else day
+    y, w, _ = d.isocalendar()
+    return ["all", f"day:{d.isoformat()}", f"week:{y}-W{w:02d}", f"program:{program}"]
+
+
+class RankIndex:
+    # Fenwick tree counting users per point value; grows by doubling
+    def __init__(self, size=1024):
+        self.size = size
+        self.tree = [0] * (size + 1)
+        self.total = 0
+
+    def _grow(self, value):
+        counts = [self._count_at(i) for i in range(self.size)]
+        while value >= self.size:
+            self.size *= 2
+        self.tree = [0] * (self.size + 1)
+        self.total = 0
+        for v, c in enumerate(counts):
+            if c:
+                self.add(v, c)
+
+    def _count_at(self, value):
+        return self.prefix(value) - (self.prefix(value - 1) if value else 0)
+
+    def add(self, value, delta=1):
+        if value >= self.size:
+            self._grow(value)
+        self.total += delta
+        i = value + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, value):
+        # number of users with points <= value
+        i = min(value, self.size - 1) + 1
+        s = 0
+        while i > 0:
+            s += self.tree[i]
+            i -= i & -i
+        return s
+
+    def rank(self, value):
+        # 1-based rank; ties share the best rank
+        return self.total - self.prefix(value) + 1
+
+
+class Leaderboard:
+    def __init__(self, path, index_ttl=30.0):
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self.path = path
+        self.index_ttl = index_ttl  # rebuild rank indexes so other processes' writes show up
+        self._lock = threading.Lock()
+        self._indexes = {}  # board -> [RankIndex, {username: points counted in it}, built_at]
+        self._pending = {}  # board -> [(username, points)] written while its rebuild runs
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    def backfill_from_attempts(self):
+        # one-off rebuild from storage.py's quiz_attempts table when it shares this file;
+        # also replaces boards built before attempts were capped at one per day
+        with self._lock:
+            has_attempts = self.db.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='quiz_attempts'").fetchone()
+            if not has_attempts or self._backfilled():
+                return
+            self.db.execute("BEGIN IMMEDIATE")  # several processes may start at once
+            try:
+                if self._backfilled():  # another process got there first
+                    self.db.rollback()
+                    return
+                best = {}
+                for user, program, day, score in self.db.execute(
+                        "SELECT username, program, day, score FROM quiz_attempts"):
+                    best[(user, program, day)] = max(best.get((user, program, day), 0), score)
+                totals = {}
+                for (user, program, day), score in best.items():
+                    for b in boards_for(program, day):
+                        totals[(b, user)] = totals.get((b, user), 0) + score
+                self.db.execute("DELETE FROM leaderboard")
+                self.db.executemany("INSERT INTO leaderboard_attempts(username, program, day, best) VALUES (?,?,?,?)",
+                                    [(u, p, d, s) for (u, p, d), s in best.items()])
+                self.db.executemany("INSERT INTO leaderboard(board, username, points) VALUES (?,?,?)",
+                                    [(b, u, p) for (b, u), p in totals.items()])
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+            self._indexes.clear()
+
+    def _backfilled(self):
+        return self.db.execute("SELECT 1 FROM leaderboard_attempts LIMIT 1").fetchone() is not None
+
+    # ---------------- writes ----------------
+    def record(self, username, program, day, score):
+        # -> points added to the boards (0 unless this beats the user's best for that program/day)
+        with self._lock:
+            boards = boards_for(program, day)
+            self.db.execute("BEGIN IMMEDIATE")  # read-modify-write is atomic across processes too
+            try:
+                row = self.db.execute("SELECT best FROM leaderboard_attempts WHERE username=? AND program=? AND day=?",
+                                      (username, program, day)).fetchone()
+                gain = score - (row[0] if row else 0)
+                if gain <= 0 and row is not None:
+                    self.db.rollback()
+                    return 0
+                gain = max(gain, 0)
+                self.db.execute(
+                    "INSERT INTO leaderboard_attempts(username, program, day, best) VALUES (?,?,?,?) "
+                    "ON CONFLICT(username, program, day) DO UPDATE SET best = excluded.best",
+                    (username, program, day, score))
+                old = {b: p for b, p in self.db.execute(
+                    f"SELECT board, points FROM leaderboard WHERE username=? AND board IN ({','.join('?' * len(boards))})",
+                    [username, *boards])}
+                self.db.executemany(
+                    "INSERT INTO leaderboard(board, username, points) VALUES (?,?,?) "
+                    "ON CONFLICT(board, username) DO UPDATE SET points = points + excluded.points",
+                    [(b, username, gain) for b in boards])
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+            for b in boards:
+                points = old.get(b, 0) + gain
+                if b in self._pending:
+                    self._pending[b].append((username, points))
+                entry = self._indexes.get(b)
+                if entry is not None:
+                    self._set(entry, username, points)
+            return gain
+
+    # ---------------- rank indexes ----------------
+    @staticmethod
+    def _set(entry, username, points):
+        # move username to points; the index's own snapshot says where it was counted
+        idx, users = entry[0], entry[1]
+        prev = users.get(username)
+        if prev is not None:
+            idx.add(max(prev, 0), -1)
+        idx.add(max(points, 0))
+        users[username] = points
+
+    def _build(self, board):
+        # full scan on a separate connection: no lock held, WAL lets it read beside writers
+        with self._lock:
+            self._pending.setdefault(board, [])
+        idx, users = RankIndex(), {}
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            for u, p in db.execute("SELECT username, points FROM leaderboard WHERE board=?", (board,)):
+                users[u] = p
+                idx.add(max(p, 0))
+        finally:
+            db.close()
+        entry = [idx, users, time.monotonic()]
+        with self._lock:
+            for u, p in self._pending.pop(board, ()):
+                self._set(entry, u, p)  # writes that landed during the scan
+            self._indexes[board] = entry
+        return entry
+
+    def _index(self, board):
+        # call without holding self._lock
+        entry = self._indexes.get(board)
+        if entry is None:
+            return self._build(board)  # first view of this board: nothing to serve yet
+        if time.monotonic() - entry[2] > self.index_ttl:
+            with self._lock:
+                stale = board not in self._pending
+                if stale:
+                    self._pending[board] = []
+            if stale:
+                threading.Thread(target=self._build, args=(board,), daemon=True, name="leaderboard-index").start()
+        return entry
+
+    # ---------------- reads ----------------
+    def size(self, board):
+        return self._index(board)[0].total
+
+    def page(self, board, page=0, page_size=10):
+        # rows come off the (board, points DESC) index; ranks from the Fenwick tree
+        idx = self._index(board)[0]
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT username, points FROM leaderboard WHERE board=? "
+                "ORDER BY points DESC, username LIMIT ? OFFSET ?",
+                (board, page_size, page * page_size)).fetchall()
+            return [{"Rank": idx.rank(max(p, 0)), "Name": u.capitalize(), "Points": p} for u, p in rows]
+
+    def top(self, board, k=10):
+        return self.page(board, 0, k)
+
+    def rank_of(self, board, username):
+        idx = self._index(board)[0]
+        with self._lock:
+            row = self.db.execute("SELECT points FROM leaderboard WHERE board=? AND username=?",
+                                  (board, username)).fetchone()
+            if row is None:
+                return None, 0
+            return idx.rank(max(row[0], 0)), row[0]
@@ -0,0 +1,213 @@
+# Lightweight in-process metrics
+# Counters and fixed-bucket histograms with optional labels, a timing decorator /
+# context manager, and Prometheus text exposition served over HTTP (METRICS_PORT)
+# or written to a file (METRICS_FILE, e.g. for node_exporter's textfile collector).
+# Opt-in sampling profiler: PROFILE_EVERY=N profiles every Nth rerun with cProfile
+# and dumps .prof files to PROFILE_DIR (open with snakeviz, or flameprof for a flamegraph).
+
+import bisect
+import cProfile
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, _fmt_labels(self.labelnames, k), v) for k, v in items]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [bucket counts..., count, sum]
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            v = self._values.get(key)
+            if v is None:
+                v = self._values[key] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                v[i] += 1
+            v[-2] += 1
+            v[-1] += value
+
+    def time(self, **labels):
+        return timer(self, **labels)
+
+    def summary(self):
+        # {labels: (count, sum)} for the admin tab
+        with self._lock:
+            return {k: (v[-2], v[-1]) for k, v in self._values.items()}
+
+    def samples(self):
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        out = []
+        for key, v in items:
+            cum = 0
+            for b, c in zip(self.buckets, v):
+                cum += c
+                out.append((self.name + "_bucket", _fmt_labels(self.labelnames, key, [("le", b)]), cum))
+            out.append((self.name + "_bucket", _fmt_labels(self.labelnames, key, [("le", "+Inf")]), v[-2]))
+            out.append((self.name + "_count", _fmt_labels(self.labelnames, key), v[-2]))
+            out.append((self.name + "_sum", _fmt_labels(self.labelnames, key), v[-1]))
+        return out
+
+
+@contextmanager
+def timer(hist, **labels):
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        hist.observe(time.perf_counter() - t, **labels)
+
+
+def timed(hist, **labels):
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(hist, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def render_prometheus():
+    lines = []
+    with _registry_lock:
+        metrics = list(_registry)
+    for m in metrics:
+        lines.append(f"# HELP {m.name} {m.help}")
+        lines.append(f"# TYPE {m.name} {m.kind}")
+        for name, labels, value in m.samples():
+            lines.append(f"{name}{labels} {value!r}")  # repr: full precision, unlike :g (6 digits)
+    return "\n".join(lines) + "\n"
+
+
+# ---------------- exporters ----------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        out = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+
+def start_http_server(port, addr="0.0.0.0"):
+    srv = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True, name="metrics-http").start()
+    return srv
+
+
+def start_file_exporter(path, interval=15.0):
+    def loop():
+        while True:
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(render_prometheus())
+            os.replace(tmp, path)
+            time.sleep(interval)
+
+    t = threading.Thread(target=loop, daemon=True, name="metrics-file")
+    t.start()
+    return t
+
+
+# ---------------- sampling profiler ----------------
+PROFILE_EVERY = int(os.getenv("PROFILE_EVERY", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+_rerun_count = 0
+_rerun_lock = threading.Lock()
+
+
+@contextmanager
+def maybe_profile(tag="rerun"):
+    global _rerun_count
+    if PROFILE_EVERY <= 0:
+        yield
+        return
+    with _rerun_lock:
+        _rerun_count += 1
+        sample = _rerun_count % PROFILE_EVERY == 0
+    if not sample:
+        yield
+        return
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        prof.dump_stats(os.path.join(PROFILE_DIR, f"{tag}-{int(time.time() * 1000)}-{os.getpid()}.prof"))
+
+
+# ---------------- hot-path metrics ----------------
+RERUN_SECONDS = Histogram("app_rerun_seconds", "Full Streamlit script rerun wall time")
+FRAGMENT_SECONDS = Histogram("app_fragment_seconds", "Fragment rerun wall time", ["fragment"])
+AI_REQUEST_SECONDS = Histogram("ai_request_seconds", "Chat Completions call latency", ["mode"])
+AI_TTFB_SECONDS = Histogram("ai_stream_headers_seconds", "Time to response headers for streamed calls")
+AI_REQUESTS = Counter("ai_requests_total", "Chat Completions calls by outcome", ["mode", "status"])
+QUIZ_GEN_SECONDS = Histogram("quiz_generation_seconds", "Daily quiz selection time")
+LEADERBOARD_SECONDS = Histogram("leaderboard_query_seconds", "Leaderboard page + rank query time")
+SESSION_STATE_BYTES = Histogram("session_state_bytes", "Pickled st.session_state size (sampled)",
+                                buckets=BYTES_BUCKETS)
@@ -0,0 +1,166 @@
+# Question bank: loaded once at startup, indexed by program, topic and difficulty
+# Banks are files under banks/ (.json, .jsonl, .csv or .parquet). Each item has
+#   program ("*" = any program), topic, difficulty (1-3), question, options, answer
+# Rows with kind="practice" carry a free-text exercise in "prompt" instead.
+# Versioned files (name.v<N>.ext, written by generate_bank.py) load only their newest version.
+# Items are kept in flat lists and the indexes are compact array('I') id lists, so
+# selecting a quiz from a 100k-item bank only touches the ids it samples.
+
+import csv
+import glob
+import hashlib
+import json
+import os
+import random
+import re
+from array import array
+
+GENERAL = "*"
+VERSIONED = re.compile(r"^(?P<name>.+)\.v(?P<version>\d+)\.[^.]+$")  # name.v<N>.ext
+
+
+def rows_from_file(path):
+    # raw item dicts from one bank file, by extension
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return data["items"] if isinstance(data, dict) else data
+    if ext == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    if ext == ".csv":
+        # options are "|" separated in one column
+        with open(path, newline="", encoding="utf-8") as f:
+            return [dict(r, options=r["options"].split("|")) for r in csv.DictReader(f)]
+    if ext == ".parquet":
+        import pandas as pd  # optional, only for parquet banks
+
+        df = pd.read_parquet(path)
+        return [dict(r, options=list(r["options"])) for r in df.to_dict("records")]
+    return []
+
+
+def bank_files(path):
+    # every bank file under path, keeping only the newest version of each versioned bank
+    latest = {}
+    files = []
+    for f in sorted(glob.glob(os.path.join(path, "*"))):
+        m = VERSIONED.match(os.path.basename(f))
+        if m is None:
+            files.append(f)
+        elif int(m["version"]) >= latest.get(m["name"], (-1, None))[0]:
+            latest[m["name"]] = (int(m["version"]), f)
+    return files + sorted(f for _, f in latest.values())
+
+
+def _seeded(key):
+    seed = hashlib.sha256(key.encode("utf-8")).digest()
+    return random.Random(int.from_bytes(seed[:8], "big"))
+
+
+def normalize(question):
+    # dedupe key: case and whitespace insensitive
+    return " ".join(str(question).lower().split())
+
+
+class QuestionBank:
+    def __init__(self):
+        self.questions = []
+        self.options = []
+        self.answers = []
+        self.topics = []        # topic name per id
+        self.difficulty = array("B")
+        self.answer_idx = array("B")  # position of the answer within options
+        self._ids = {}          # normalized question text -> id, drops duplicates across files
+        self.by_program = {}    # program -> array of ids
+        self.by_topic = {}      # (program, topic) -> array of ids
+        self.by_level = {}      # (program, difficulty) -> array of ids
+        self.practice = {}      # program -> list of practice exercise prompts
+        self._practice_seen = set()
+
+    @classmethod
+    def from_dir(cls, path):
+        bank = cls()
+        for f in bank_files(path):
+            bank.extend(rows_from_file(f))
+        return bank
+
+    def extend(self, rows):
+        for r in rows:
+            if r.get("kind") == "practice":
+                self._add_practice(r)
+                continue
+            q = str(r["question"]).strip()
+            opts = tuple(str(o) for o in r["options"])
+            ans = str(r["answer"])
+            key = normalize(q)
+            if not q or ans not in opts or key in self._ids:
+                continue  # skip malformed and duplicate questions
+            i = len(self.questions)
+            self._ids[key] = i
+            program = r.get("program") or GENERAL
+            topic = r.get("topic") or "general"
+            level = int(r.get("difficulty") or 1)
+            self.questions.append(q)
+            self.options.append(opts)
+            self.answers.append(ans)
+            self.topics.append(topic)
+            self.difficulty.append(level)
+            self.answer_idx.append(opts.index(ans))
+            self.by_program.setdefault(program, array("I")).append(i)
+            self.by_topic.setdefault((program, topic), array("I")).append(i)
+            self.by_level.setdefault((program, level), array("I")).append(i)
+
+    def _add_practice(self, r):
+        prompt = str(r.get("prompt") or "").strip()
+        key = normalize(prompt)
+        if prompt and key not in self._practice_seen:
+            self._practice_seen.add(key)
+            self.practice.setdefault(r.get("program") or GENERAL, []).append(prompt)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def id_of(self, question):
+        return self._ids.get(normalize(question), -1)
+
+    def item(self, i):
+        return self.questions[i], list(self.options[i]), self.answers[i]
+
+    def _pool(self, program, topic=None, difficulty=None):
+        if topic is not None:
+            return self.by_topic.get((program, topic), array("I"))
+        if difficulty is not None:
+            return self.by_level.get((program, difficulty), array("I"))
+        return self.by_program.get(program, array("I"))
+
+    def daily_quiz(self, user, program, day, n=20, topic=None, difficulty=None):
+        # options are shuffled per item (same seed -> same order on every rerun); banks list
+        # the answer first, so serving file order would give the quiz away
+        rng = _seeded(f"options|{user}|{program}|{day}")
+        quiz = []
+        for i in self.daily_quiz_ids(user, program, day, n, topic, difficulty):
+            q, opts, ans = self.item(i)
+            rng.shuffle(opts)
+            quiz.append((q, opts, ans))
+        return quiz
+
+    def daily_quiz_ids(self, user, program, day, n=20, topic=None, difficulty=None):
+        # same (user, program, day) -> same quiz on every rerun, server and process
+        rng = _seeded(f"{user}|{program}|{day}")
+        own = self._pool(program, topic, difficulty)
+        general = self._pool(GENERAL, topic, difficulty)
+        # up to half the quiz from the program's own questions, rest from the shared pool
+        k_own = min(len(own), max(n // 2, n - len(general)))
+        ids = [own[j] for j in rng.sample(range(len(own)), k_own)]
+        k_gen = min(len(general), n - k_own)
+        ids += [general[j] for j in rng.sample(range(len(general)), k_gen)]
+        rng.shuffle(ids)
+        return ids
+
+    def practice_prompts(self, user, program, day, n=5):
+        # daily, per-user sample of practice exercises for a program
+        pool = self.practice.get(program, [])
+        rng = _seeded(f"practice|{user}|{program}|{day}")
+        return rng.sample(pool, min(n, len(pool)))
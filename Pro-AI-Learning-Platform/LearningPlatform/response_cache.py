@@ -0,0 +1,186 @@
+# Response cache for AI Tutor answers
+# Keyed on normalized system prompt + question, stored in SQLite so it survives
+# Streamlit restarts and is shared by every server process pointing at the same file.
+# Tier 1: exact match on the normalized key.
+# Tier 2 (optional): TF-IDF nearest neighbour among questions with the same system prompt,
+# from a sparse in-memory index per scope that put() and eviction update in place.
+
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+_WS = re.compile(r"\s+")
+_TOKEN = re.compile(r"[a-z0-9]+")
+INDEX_MAX_AGE = 300  # seconds before a scope's index is rebuilt to pick up other processes' writes
+
+
+def normalize(text):
+    return _WS.sub(" ", (text or "").strip().lower()).strip(" ?!.")
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class _ScopeIndex:
+    # sparse TF-IDF over one scope's questions: term counts per key plus the keys holding each term
+    def __init__(self, rows):
+        self.built = time.monotonic()
+        self.tf = {}        # key -> Counter(term)
+        self.postings = {}  # term -> set of keys (its document frequency is the set size)
+        for key, question in rows:
+            self.add(key, question)
+
+    def add(self, key, question):
+        if key in self.tf:
+            return
+        tf = self.tf[key] = Counter(_TOKEN.findall(question))
+        for t in tf:
+            self.postings.setdefault(t, set()).add(key)
+
+    def remove(self, key):
+        for t in self.tf.pop(key, ()):
+            keys = self.postings[t]
+            keys.discard(key)
+            if not keys:
+                del self.postings[t]
+
+    def nearest(self, question):
+        # -> (key, cosine similarity); only questions sharing a term with this one can score above 0
+        n = len(self.tf)
+        idf = {}
+
+        def weight(t):
+            if t not in idf:
+                idf[t] = math.log((1.0 + n) / (1.0 + len(self.postings.get(t, ())))) + 1.0
+            return idf[t]
+
+        qv = {t: c * weight(t) for t, c in Counter(_TOKEN.findall(question)).items()}
+        qnorm = math.sqrt(sum(v * v for v in qv.values()))
+        best, best_sim = None, 0.0
+        for key in set().union(*(self.postings.get(t, ()) for t in qv)):
+            tf = self.tf[key]
+            dot = sum(c * weight(t) * qv[t] for t, c in tf.items() if t in qv)
+            norm = math.sqrt(sum((c * weight(t)) ** 2 for t, c in tf.items()))
+            sim = dot / (norm * qnorm) if norm and qnorm else 0.0
+            if sim > best_sim:
+                best, best_sim = key, sim
+        return best, best_sim
+
+
+class ResponseCache:
+    def __init__(self, path, max_entries=5000, ttl_seconds=7 * 24 * 3600,
+                 semantic=False, threshold=0.9):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.semantic = semantic
+        self.threshold = threshold
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._indexes = {}  # scope -> _ScopeIndex, built on the first semantic lookup
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                scope TEXT NOT NULL,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_rc_scope ON response_cache(scope);
+            CREATE INDEX IF NOT EXISTS ix_rc_access ON response_cache(last_access);
+        """)
+        self._db.commit()
+
+    # ---------------- lookup ----------------
+    def get(self, system_prompt, question):
+        scope = _digest(normalize(system_prompt))
+        q = normalize(question)
+        key = _digest(scope + "\n" + q)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT answer, created FROM response_cache WHERE key=?", (key,)).fetchone()
+            if row and now - row[1] <= self.ttl:
+                self._touch(key, now)
+                self.hits += 1
+                return row[0]
+            if self.semantic:
+                ans = self._nearest(scope, q, now)
+                if ans is not None:
+                    self.semantic_hits += 1
+                    return ans
+            self.misses += 1
+            return None
+
+    def _touch(self, key, now):
+        self._db.execute("UPDATE response_cache SET last_access=? WHERE key=?", (now, key))
+        self._db.commit()
+
+    def _nearest(self, scope, q, now):
+        key, sim = self._index(scope).nearest(q)
+        if key is None or sim < self.threshold:
+            return None
+        row = self._db.execute("SELECT answer, created FROM response_cache WHERE key=?", (key,)).fetchone()
+        if not row or now - row[1] > self.ttl:
+            return None
+        self._touch(key, now)
+        return row[0]
+
+    def _index(self, scope):
+        idx = self._indexes.get(scope)
+        if idx is None or time.monotonic() - idx.built > INDEX_MAX_AGE:
+            rows = self._db.execute("SELECT key, question FROM response_cache WHERE scope=?", (scope,)).fetchall()
+            idx = self._indexes[scope] = _ScopeIndex(rows)
+        return idx
+
+    # ---------------- store / evict ----------------
+    def put(self, system_prompt, question, answer):
+        if not answer:
+            return
+        scope = _digest(normalize(system_prompt))
+        q = normalize(question)
+        key = _digest(scope + "\n" + q)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO response_cache(key, scope, question, answer, created, last_access) "
+                "VALUES (?,?,?,?,?,?)", (key, scope, q, answer, now, now))
+            gone = self._evict(now)
+            self._db.commit()
+            for k, s in gone:
+                if s in self._indexes:
+                    self._indexes[s].remove(k)
+            if scope in self._indexes and (key, scope) not in gone:
+                self._indexes[scope].add(key, q)
+
+    def _evict(self, now):
+        # TTL first, then least-recently-used rows beyond the size cap; -> [(key, scope)] removed
+        gone = self._db.execute("SELECT key, scope FROM response_cache WHERE created < ?", (now - self.ttl,)).fetchall()
+        n = self._db.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0] - len(gone)
+        if n > self.max_entries:
+            gone += self._db.execute(
+                "SELECT key, scope FROM response_cache WHERE created >= ? ORDER BY last_access LIMIT ?",
+                (now - self.ttl, n - self.max_entries)).fetchall()
+        self._db.executemany("DELETE FROM response_cache WHERE key=?", [(k,) for k, _ in gone])
+        return gone
+
+    def stats(self):
+        with self._lock:
+            size = self._db.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+        lookups = self.hits + self.semantic_hits + self.misses
+        hit_rate = (self.hits + self.semantic_hits) / lookups if lookups else 0.0
+        return {"size": size, "hits": self.hits, "semantic_hits": self.semantic_hits,
+                "misses": self.misses, "hit_rate": hit_rate}
@@ -0,0 +1,263 @@
+# Bulk practice-answer review
+# Grades a cohort's practice answers (student, question, answer) with the AI in
+# batches: several answers go into one structured-output prompt, batches run
+# concurrently through AIDispatcher (bounded workers + rate limit), and the JSON
+# scores are parsed into a results table.
+# Results are stored per answer hash (normalized question + answer) in SQLite as each
+# batch finishes. That store is both the cache and the checkpoint: identical answers
+# are graded once, and a rerun after an interruption only sends what is still missing.
+#
+#   python review_batch.py answers.csv --api-key $KEY --out reviewed.csv
+#   python review_batch.py answers.jsonl --base-url http://127.0.0.1:8765/v1 --api-key x
+# Input columns: student (or username), question, answer. CSV, JSONL or Parquet.
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from ai_client import DEFAULT_BASE_URL, DEFAULT_MODEL
+from ai_jobs import AIDispatcher
+from config import DB_PATH
+
+REVIEW_SYSTEM = "You are a friendly tutor who grades short answers 0-10 and gives 2 improvements."
+BATCH_SYSTEM = (REVIEW_SYSTEM + " You grade many answers at once. Judge each answer only against its own "
+                "question. Feedback: at most 2 short sentences.")
+BATCH_SIZE = int(os.getenv("REVIEW_BATCH_SIZE", "8"))
+MAX_ATTEMPTS = 3
+MAX_ANSWER_CHARS = 2000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS practice_reviews (
+    hash TEXT PRIMARY KEY,
+    score INTEGER NOT NULL,
+    feedback TEXT NOT NULL,
+    model TEXT NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+
+def _norm(text):
+    return " ".join(str(text or "").lower().split())
+
+
+def answer_hash(question, answer):
+    return hashlib.sha256(f"{_norm(question)}\n{_norm(answer)}".encode("utf-8")).hexdigest()
+
+
+class ReviewStore:
+    def __init__(self, path):
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    def get_many(self, hashes):
+        # -> {hash: (score, feedback)}
+        hashes = list(hashes)
+        out = {}
+        with self._lock:
+            for i in range(0, len(hashes), 500):  # stay under SQLite's bound-parameter limit
+                chunk = hashes[i:i + 500]
+                out.update((h, (s, f)) for h, s, f in self.db.execute(
+                    f"SELECT hash, score, feedback FROM practice_reviews WHERE hash IN ({','.join('?' * len(chunk))})",
+                    chunk))
+        return out
+
+    def put_many(self, results, model):
+        # results: {hash: (score, feedback)}
+        now = time.time()
+        with self._lock, self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO practice_reviews(hash, score, feedback, model, created) VALUES (?,?,?,?,?)",
+                [(h, s, f, model, now) for h, (s, f) in results.items()])
+
+
+def load_submissions(path, data=None):
+    # -> [{"student", "question", "answer"}]; data: raw bytes (e.g. an upload) instead of reading path
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        import pandas as pd  # optional, only for parquet input
+
+        rows = pd.read_parquet(io.BytesIO(data) if data is not None else path).to_dict("records")
+    else:
+        if data is not None:
+            text = data.decode("utf-8-sig")
+        else:
+            with open(path, encoding="utf-8-sig") as f:
+                text = f.read()
+        if ext == ".jsonl":
+            rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+        else:
+            rows = list(csv.DictReader(io.StringIO(text)))
+    out = []
+    for r in rows:
+        q, a = str(r.get("question") or "").strip(), str(r.get("answer") or "").strip()
+        if q and a:
+            out.append({"student": str(r.get("student") or r.get("username") or ""), "question": q, "answer": a})
+    return out
+
+
+# ---------------- prompts ----------------
+def build_batch_messages(items):
+    # items: [(hash, question, answer)]; answers under the same question share its text
+    ids, lines, questions = {}, [], {}
+    for h, q, a in items:
+        if q not in questions:
+            questions[q] = len(questions) + 1
+            lines.append(f"Q{questions[q]}: {q}")
+        ids[str(len(ids) + 1)] = h
+        lines.append(f"  [{len(ids)}] (answer to Q{questions[q]}) {a[:MAX_ANSWER_CHARS]}")
+    prompt = ("Grade each numbered answer.\n\n" + "\n".join(lines) + "\n\n"
+              'Return only JSON: {"results": [{"id": <answer number>, "score": <0-10>, "feedback": "..."}]}')
+    return [{"role": "system", "content": BATCH_SYSTEM}, {"role": "user", "content": prompt}], ids
+
+
+def parse_results(txt, ids):
+    # -> {hash: (score, feedback)} for the ids the model answered properly
+    txt = (txt or "").strip()
+    start, end = txt.find("{"), txt.rfind("}")
+    if start < 0 or end <= start:
+        return {}
+    try:
+        data = json.loads(txt[start:end + 1])
+    except ValueError:
+        return {}
+    results = data.get("results") if isinstance(data, dict) else None
+    out = {}
+    for r in results if isinstance(results, list) else []:
+        if not isinstance(r, dict):
+            continue
+        h = ids.get(str(r.get("id")))
+        try:
+            score = int(round(float(r.get("score"))))
+        except (TypeError, ValueError):
+            continue
+        if h is not None:
+            out[h] = (min(10, max(0, score)), " ".join(str(r.get("feedback") or "").split()))
+    return out
+
+
+# ---------------- pipeline ----------------
+class BulkReview:
+    # review_submissions in steps: each step() collects the batches that have landed and,
+    # once a round settles, submits the next one, so a UI can poll it without blocking
+    def __init__(self, rows, dispatcher, api_key, base_url=DEFAULT_BASE_URL, model=DEFAULT_MODEL,
+                 store=None, batch_size=BATCH_SIZE, log=print):
+        self.rows, self.dispatcher, self.store, self.log = rows, dispatcher, store, log
+        self.api_key, self.base_url, self.model = api_key, base_url, model
+        self.unique = {}
+        for r in rows:
+            self.unique.setdefault(answer_hash(r["question"], r["answer"]), (r["question"], r["answer"]))
+        self.done = store.get_many(self.unique) if store is not None else {}
+        self.cached = set(self.done)
+        # same question next to each other so batches share its text
+        self.todo = sorted((h for h in self.unique if h not in self.done), key=lambda h: self.unique[h])
+        self.size, self.calls, self.attempts = batch_size, 0, 0
+        self.jobs = []  # [(job id, {answer number: hash})] of the current round
+        self.landed = self.total = 0  # batches back / sent in the current round
+        self._submit_round()
+
+    def _submit_round(self):
+        if not self.todo or self.attempts >= MAX_ATTEMPTS:
+            return
+        self.attempts += 1
+        self.jobs, self.landed = [], 0
+        for i in range(0, len(self.todo), self.size):
+            msgs, ids = build_batch_messages([(h, *self.unique[h]) for h in self.todo[i:i + self.size]])
+            self.jobs.append((self.dispatcher.submit(msgs, self.api_key, self.base_url, self.model), ids))
+        self.calls += len(self.jobs)
+        self.total = len(self.jobs)
+
+    def step(self, timeout=0):
+        # -> True once every answer is graded or out of attempts; timeout: seconds to wait per batch
+        pending = []
+        for job_id, ids in self.jobs:
+            status, txt, err = (self.dispatcher.wait(job_id, timeout) if timeout
+                                else self.dispatcher.poll(job_id))
+            if status in ("queued", "running"):
+                pending.append((job_id, ids))
+                continue
+            got = {} if err else parse_results(txt, ids)
+            if got and self.store is not None:
+                self.store.put_many(got, self.model)  # checkpoint as soon as a batch lands
+            self.done.update(got)
+            self.landed += 1
+            self.log(f"  batch {self.landed}/{self.total}: {len(got)}/{len(ids)} graded" + (f" ({err})" if err else ""))
+        self.jobs = pending
+        if not self.jobs:
+            self.todo = [h for h in self.todo if h not in self.done]
+            self.size = max(1, self.size // 2)  # smaller batches for whatever the model skipped or garbled
+            self._submit_round()
+        return not self.jobs
+
+    def results(self):
+        # -> (results table rows, stats); each row gets score/feedback/source (cached, ai or failed)
+        out = []
+        for r in self.rows:
+            h = answer_hash(r["question"], r["answer"])
+            score, feedback = self.done.get(h, (None, ""))
+            source = "failed" if score is None else "cached" if h in self.cached else "ai"
+            out.append({**r, "score": score, "feedback": feedback, "source": source})
+        stats = {"rows": len(self.rows), "unique": len(self.unique), "cached": len(self.cached),
+                 "requests": self.calls, "failed": len(self.todo)}
+        return out, stats
+
+
+def review_submissions(rows, dispatcher, api_key, base_url=DEFAULT_BASE_URL, model=DEFAULT_MODEL,
+                       store=None, batch_size=BATCH_SIZE, log=print):
+    # blocking form for the command line
+    review = BulkReview(rows, dispatcher, api_key, base_url, model, store, batch_size, log)
+    while not review.step(timeout=1.0):
+        pass
+    return review.results()
+
+
+def write_results(results, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=["student", "question", "answer", "score", "feedback", "source"])
+        w.writeheader()
+        w.writerows(results)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Grade practice answers in batches with the AI.")
+    ap.add_argument("submissions", help="CSV / JSONL / Parquet with student, question, answer")
+    ap.add_argument("--api-key", default=os.getenv("AI_API_KEY", ""))
+    ap.add_argument("--base-url", default=os.getenv("AI_BASE_URL", DEFAULT_BASE_URL))
+    ap.add_argument("--model", default=DEFAULT_MODEL)
+    ap.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="answers per request")
+    ap.add_argument("--workers", type=int, default=8, help="concurrent upstream requests")
+    ap.add_argument("--rate", type=float, default=2.0, help="requests/sec")
+    ap.add_argument("--burst", type=int, default=5)
+    ap.add_argument("--db", default=DB_PATH, help="review cache/checkpoint (defaults to the app database)")
+    ap.add_argument("--out", default="reviewed.csv")
+    args = ap.parse_args(argv)
+
+    rows = load_submissions(args.submissions)
+    t0 = time.perf_counter()
+    dispatcher = AIDispatcher(workers=args.workers, rate=args.rate, burst=args.burst)
+    results, stats = review_submissions(rows, dispatcher, args.api_key, args.base_url, args.model,
+                                        ReviewStore(args.db), args.batch_size)
+    write_results(results, args.out)
+    print(f"{stats['rows']} answers ({stats['unique']} unique, {stats['cached']} cached) graded with "
+          f"{stats['requests']} requests in {time.perf_counter() - t0:.1f}s -> {args.out}")
+    if stats["failed"]:
+        print(f"{stats['failed']} answers could not be graded; rerun to retry only those")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+# Shared session + credential store
+# Login state lives outside st.session_state, so any app process behind a load balancer
+# (or a restarted one) can tell who a browser tab belongs to:
+#   - credentials are scrypt hashes with a per-user salt
+#   - a login issues an HMAC-signed token (kept in a browser cookie, never in the URL); the
+#     signature is checked before any store lookup, and the server-side record lets logout
+#     revoke it
+#   - restoring a session rotates the token: the old one is deleted, so a copy of it is good
+#     for at most one restore
+# The backing key-value store has a Redis-compatible surface (get / set(ex, nx) / setex /
+# expire / delete) with per-key TTL:
+#   memory://          in-process stand-in, bounded (LRU) - single process / tests
+#   sqlite:///path.db  shared by every process on one host
+#   redis://host:6379  shared across hosts (needs the optional `redis` package)
+# User data itself (profile, scores, chat) is already in storage.py's SQLite database.
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(12 * 3600)))  # each restore issues a fresh token
+MEMORY_MAX_KEYS = int(os.getenv("SESSION_MAX_KEYS", "100000"))
+SWEEP_EVERY = 256  # writes between sweeps of expired keys
+SCRYPT_N, SCRYPT_R, SCRYPT_P = 2 ** 14, 8, 1
+
+
+def _text(value):
+    # redis-py returns bytes, the local stores return str
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+class MemoryKV:
+    # in-process stand-in for Redis: per-key TTL, least recently used keys evicted past max_keys.
+    # Only keys with a TTL (sessions) are evicted; keys without one (credentials, the signing
+    # secret) are kept apart so a flood of sessions cannot push them out.
+    def __init__(self, max_keys=MEMORY_MAX_KEYS):
+        self.max_keys = max_keys
+        self._data = OrderedDict()  # key -> (value, expires), keys with a TTL
+        self._static = {}           # key -> value, keys without a TTL
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _live(self, key, now):
+        item = self._data.get(key)
+        if item is not None and item[1] <= now:
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key):
+        with self._lock:
+            if key in self._static:
+                return self._static[key]
+            item = self._live(key, time.time())
+            if item is None:
+                return None
+            self._data.move_to_end(key)
+            return item[0]
+
+    def set(self, key, value, ex=None, nx=False):
+        now = time.time()
+        with self._lock:
+            if nx and (key in self._static or self._live(key, now) is not None):
+                return None
+            if not ex:
+                self._data.pop(key, None)
+                self._static[key] = value
+                return True
+            self._static.pop(key, None)
+            self._data[key] = (value, now + ex)
+            self._data.move_to_end(key)
+            self._writes += 1
+            if self._writes % SWEEP_EVERY == 0:
+                for k in [k for k, (_, exp) in self._data.items() if exp <= now]:
+                    del self._data[k]
+            while len(self._data) > self.max_keys:
+                self._data.popitem(last=False)
+        return True
+
+    def setex(self, key, seconds, value):
+        return self.set(key, value, ex=seconds)
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if key in self._static:
+                self._data[key] = (self._static.pop(key), time.time() + seconds)
+                return True
+            item = self._live(key, time.time())
+            if item is None:
+                return False
+            self._data[key] = (item[0], time.time() + seconds)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum((self._static.pop(k, None) is not None) + (self._data.pop(k, None) is not None)
+                       for k in keys)
+
+
+class SQLiteKV:
+    # same surface, one table; expired rows are dropped on read and swept periodically
+    def __init__(self, path):
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL);
+            CREATE INDEX IF NOT EXISTS ix_kv_expires ON kv(expires);
+        """)
+        self.db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self.db.execute("SELECT value, expires FROM kv WHERE key=?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] <= now:
+                with self.db:
+                    self.db.execute("DELETE FROM kv WHERE key=? AND expires<=?", (key, now))
+                return None
+            return row[0]
+
+    def set(self, key, value, ex=None, nx=False):
+        now = time.time()
+        expires = now + ex if ex else None
+        with self._lock, self.db:
+            if nx:
+                # insert, or take over a key whose TTL already ran out
+                cur = self.db.execute(
+                    "INSERT INTO kv(key, value, expires) VALUES (?,?,?) ON CONFLICT(key) DO UPDATE SET "
+                    "value=excluded.value, expires=excluded.expires WHERE kv.expires IS NOT NULL AND kv.expires<=?",
+                    (key, value, expires, now))
+                if cur.rowcount == 0:
+                    return None
+            else:
+                self.db.execute("INSERT OR REPLACE INTO kv(key, value, expires) VALUES (?,?,?)", (key, value, expires))
+            self._writes += 1
+            if self._writes % SWEEP_EVERY == 0:
+                self.db.execute("DELETE FROM kv WHERE expires IS NOT NULL AND expires<=?", (now,))
+        return True
+
+    def setex(self, key, seconds, value):
+        return self.set(key, value, ex=seconds)
+
+    def expire(self, key, seconds):
+        now = time.time()
+        with self._lock, self.db:
+            cur = self.db.execute("UPDATE kv SET expires=? WHERE key=? AND (expires IS NULL OR expires>?)",
+                                  (now + seconds, key, now))
+        return cur.rowcount > 0
+
+    def delete(self, *keys):
+        with self._lock, self.db:
+            return sum(self.db.execute("DELETE FROM kv WHERE key=?", (k,)).rowcount for k in keys)
+
+
+def open_kv(url):
+    if url.startswith("memory://"):
+        return MemoryKV()
+    if url.startswith("sqlite://"):
+        return SQLiteKV(url[len("sqlite://"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        import redis  # optional, only for the Redis backend
+
+        return redis.Redis.from_url(url)
+    raise ValueError(f"Unsupported SESSION_STORE: {url}")
+
+
+# ---------------- credentials + signed sessions ----------------
+def hash_password(password, salt=None):
+    salt = salt or secrets.token_bytes(16)
+    dk = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, dklen=32)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${dk.hex()}"
+
+
+def check_password(password, stored):
+    try:
+        _, n, r, p, salt, expected = stored.split("$")
+        dk = hashlib.scrypt(password.encode("utf-8"), salt=bytes.fromhex(salt), n=int(n), r=int(r), p=int(p),
+                            dklen=len(expected) // 2)
+    except (ValueError, AttributeError):
+        return False
+    return hmac.compare_digest(dk.hex(), expected)
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class AuthStore:
+    def __init__(self, kv, secret=None, ttl=SESSION_TTL):
+        self.kv = kv
+        self.ttl = ttl
+        if not secret:
+            # first process to start picks the key; the others read it from the shared store
+            kv.set("auth:secret", secrets.token_hex(32), nx=True)
+            secret = _text(kv.get("auth:secret"))
+        self._key = secret.encode("utf-8")
+        self._dummy = hash_password(secrets.token_hex(8))
+
+    # ---------------- users ----------------
+    def add_user(self, username, password, overwrite=False):
+        stored = hash_password(password)
+        return bool(self.kv.set(f"auth:user:{username}", stored, nx=not overwrite))
+
+    def seed(self, accounts):
+        # demo accounts: hash only the ones the store does not have yet
+        for username, password in accounts.items():
+            if self.kv.get(f"auth:user:{username}") is None:
+                self.add_user(username, password)
+
+    def verify(self, username, password):
+        stored = _text(self.kv.get(f"auth:user:{username}"))
+        if stored is None:
+            check_password(password, self._dummy)  # same cost for unknown users
+            return False
+        return check_password(password, stored)
+
+    # ---------------- sessions ----------------
+    def _sign(self, payload):
+        return _b64(hmac.new(self._key, payload.encode("ascii"), hashlib.sha256).digest())
+
+    def create_session(self, username):
+        sid = secrets.token_urlsafe(16)
+        self.kv.setex(f"auth:session:{sid}", self.ttl, username)
+        payload = _b64(json.dumps({"sid": sid, "u": username}, separators=(",", ":")).encode("utf-8"))
+        return f"{payload}.{self._sign(payload)}"
+
+    def _parse(self, token):
+        try:
+            payload, sig = token.split(".")
+            if not hmac.compare_digest(sig, self._sign(payload)):
+                return None
+            return json.loads(_unb64(payload))
+        except (ValueError, AttributeError, UnicodeEncodeError):
+            return None
+
+    def resolve(self, token):
+        # -> username for a valid, unexpired, unrevoked token; refreshes its TTL
+        data = self._parse(token)
+        if data is None:
+            return None
+        key = f"auth:session:{data['sid']}"
+        if _text(self.kv.get(key)) != data["u"]:
+            return None
+        self.kv.expire(key, self.ttl)
+        return data["u"]
+
+    def rotate(self, token):
+        # -> (username, new token), or (None, None); only the first caller can trade a token in
+        data = self._parse(token)
+        if data is None:
+            return None, None
+        key = f"auth:session:{data['sid']}"
+        if _text(self.kv.get(key)) != data["u"] or not self.kv.delete(key):
+            return None, None
+        return data["u"], self.create_session(data["u"])
+
+    def revoke(self, token):
+        data = self._parse(token)
+        if data is not None:
+            self.kv.delete(f"auth:session:{data['sid']}")
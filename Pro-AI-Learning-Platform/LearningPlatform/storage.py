@@ -0,0 +1,146 @@
+# Persistent storage for profiles, quiz attempts and tutor chat turns
+# SQLite in WAL mode: readers never block the writer, and several Streamlit
+# processes can share one database file. Quiz attempts are written straight through
+# (other processes rebuild leaderboards and sessions from them). Chat turns are
+# buffered and flushed in one transaction per batch, at the latest flush_interval
+# seconds after the first unflushed turn.
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+
+PROFILE_FIELDS = ("name", "program", "year", "fav_song", "fav_food", "interests", "photo")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    name TEXT, program TEXT, year TEXT, fav_song TEXT, fav_food TEXT, interests TEXT,
+    photo TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS quiz_attempts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    program TEXT NOT NULL,
+    day TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    max_score INTEGER NOT NULL,
+    answers TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_attempts_user_day ON quiz_attempts(username, day);
+CREATE INDEX IF NOT EXISTS ix_attempts_program_day ON quiz_attempts(program, day);
+CREATE TABLE IF NOT EXISTS chat_turns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    program TEXT,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    ts TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_chat_user ON chat_turns(username, id);
+"""
+
+
+class Storage:
+    def __init__(self, path, batch_size=50, flush_interval=2.0):
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._pending_turns = []
+        self._last_flush = time.monotonic()
+        self._timer = None  # pending flush for a partly filled batch
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self._migrate()
+        self.db.commit()
+        atexit.register(self.flush)
+
+    def _migrate(self):
+        # columns added after the first release
+        cols = {r[1] for r in self.db.execute("PRAGMA table_info(quiz_attempts)")}
+        if "answers" not in cols:
+            self.db.execute("ALTER TABLE quiz_attempts ADD COLUMN answers TEXT")
+
+    # ---------------- batching ----------------
+    def _maybe_flush(self):
+        if len(self._pending_turns) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+        elif self._timer is None:
+            # a lone write must not sit in memory until the next one arrives
+            self._timer = threading.Timer(self.flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending_turns:
+                with self.db:
+                    self.db.executemany(
+                        "INSERT INTO chat_turns(username, program, question, answer, ts) VALUES (?,?,?,?,?)",
+                        self._pending_turns)
+                self._pending_turns = []
+            self._last_flush = time.monotonic()
+
+    # ---------------- users / profiles ----------------
+    def get_profile(self, username):
+        with self._lock:
+            row = self.db.execute(
+                f"SELECT {', '.join(PROFILE_FIELDS)} FROM users WHERE username=?", (username,)).fetchone()
+        if not row:
+            return {}
+        return {k: v for k, v in zip(PROFILE_FIELDS, row) if v is not None}
+
+    def save_profile(self, username, profile):
+        vals = [profile.get(k) for k in PROFILE_FIELDS]
+        now = time.time()
+        cols = ", ".join(PROFILE_FIELDS)
+        updates = ", ".join(f"{k}=excluded.{k}" for k in PROFILE_FIELDS)
+        with self._lock, self.db:
+            self.db.execute(
+                f"INSERT INTO users(username, {cols}, created, updated) "
+                f"VALUES (?, {', '.join('?' * len(PROFILE_FIELDS))}, ?, ?) "
+                f"ON CONFLICT(username) DO UPDATE SET {updates}, updated=excluded.updated",
+                [username, *vals, now, now])
+
+    # ---------------- quiz attempts ----------------
+    def add_quiz_attempt(self, username, program, day, score, max_score, answers=None):
+        # answers: [(question, chosen option), ...] kept for offline re-scoring (grading.py)
+        answers = json.dumps(answers) if answers is not None else None
+        with self._lock, self.db:
+            self.db.execute(
+                "INSERT INTO quiz_attempts(username, program, day, score, max_score, answers, created) "
+                "VALUES (?,?,?,?,?,?,?)", (username, program, day, score, max_score, answers, time.time()))
+
+    def list_scores(self, username):
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT day, program, score FROM quiz_attempts WHERE username=? ORDER BY id",
+                (username,)).fetchall()
+        return [{"date": d, "program": p, "total": s} for d, p, s in rows]
+
+    # ---------------- tutor chat ----------------
+    def add_chat_turn(self, username, program, question, answer, ts):
+        with self._lock:
+            self._pending_turns.append((username, program, question, answer, ts))
+            self._maybe_flush()
+
+    def recent_chat(self, username, limit=6):
+        with self._lock:
+            self.flush()
+            rows = self.db.execute(
+                "SELECT question, answer, ts FROM chat_turns WHERE username=? ORDER BY id DESC LIMIT ?",
+                (username, limit)).fetchall()
+        return [{"q": q, "a": a, "ts": ts} for q, a, ts in reversed(rows)]
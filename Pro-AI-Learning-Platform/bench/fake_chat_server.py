@@ -0,0 +1,165 @@
+# Local fake Chat Completions server for benchmarks
+# Speaks the subset of the API that ai_client.py uses: POST /v1/chat/completions,
+# plain JSON or "stream": true SSE. Latency and error rate are configurable.
+# Bank-generation prompts (generate_bank.py, "Return only JSON") get a synthetic JSON
+# payload with a few duplicate and malformed items mixed in, to exercise validation.
+# Batched review prompts (review_batch.py) get a score per numbered answer, with the
+# occasional answer skipped so the retry path runs too.
+# Tests script failures with fail_codes (statuses for the next calls, in order) and
+# drop_after (cut a stream off mid-body after that many tokens).
+#
+#   python bench/fake_chat_server.py --port 8765 --latency 0.4 --jitter 0.2 --error-rate 0.05
+#   then use http://127.0.0.1:8765/v1 as the app's Base URL
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeChatServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, latency=0.3, jitter=0.1, error_rate=0.0, token_delay=0.01, fail_codes=(),
+                 drop_after=None):
+        super().__init__(addr, _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.token_delay = token_delay
+        self.fail_codes = list(fail_codes)
+        self.drop_after = drop_after
+        self.calls = 0
+        self.errors = 0
+        self.connections = 0  # TCP connections accepted; keep-alive clients reuse them
+        self._lock = threading.Lock()
+
+    def verify_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        return True
+
+    def next_failure(self):
+        with self._lock:
+            return self.fail_codes.pop(0) if self.fail_codes else None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count(self, error):
+        with self._lock:
+            self.calls += 1
+            self.errors += int(error)
+
+
+def fake_bank_payload(prompt):
+    # deterministic per prompt; ~1 in 8 items duplicated or malformed
+    rng = random.Random(prompt)
+    m = re.search(r"Topic: (.+)", prompt)
+    topic = m[1] if m else "general"
+    m = re.search(r"Write (\d+) .*? and (\d+)", prompt)
+    n_mcq, n_practice = (int(m[1]), int(m[2])) if m else (4, 1)
+    mcq = []
+    for i in range(n_mcq):
+        k = rng.randrange(10**6)
+        opts = [f"{topic} option {k}-{j}" for j in range(4)]
+        item = {"question": f"Which statement about {topic} concept #{k} is correct?", "options": opts,
+                "answer": rng.choice(opts)}
+        roll = rng.random()
+        if roll < 0.06 and mcq:
+            item = dict(mcq[-1])  # exact duplicate
+        elif roll < 0.12:
+            item["answer"] = "none of these"  # answer not among the options
+        mcq.append(item)
+    practice = [f"In 2-5 lines, explain {topic} idea #{rng.randrange(10**6)} with one example."
+                for _ in range(n_practice)]
+    return "```json\n" + json.dumps({"mcq": mcq, "practice": practice}) + "\n```"
+
+
+def fake_review_payload(prompt):
+    results = [{"id": int(n), "score": len(answer.strip()) % 11, "feedback": "Add an example. Be more precise."}
+               for n, answer in re.findall(r"\[(\d+)\] \(answer to Q\d+\) (.*)", prompt)
+               if random.random() > 0.05]
+    return json.dumps({"results": results})
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like a real provider
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, code, obj):
+        out = json.dumps(obj).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def do_POST(self):
+        srv = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        code = srv.next_failure()
+        fail = code is not None or random.random() < srv.error_rate
+        srv.count(fail)
+        time.sleep(max(0.0, srv.latency + random.uniform(-srv.jitter, srv.jitter)))
+        if fail:
+            code = code or random.choice((429, 500, 503))
+            return self._send_json(code, {"error": {"message": f"fake upstream error {code}"}})
+        question = (body.get("messages") or [{}])[-1].get("content", "")
+        if "Return only JSON" in question and '"results"' in question:
+            answer = fake_review_payload(question)
+        elif "Return only JSON" in question:
+            answer = fake_bank_payload(question)
+        else:
+            answer = f"Fake answer about: {question[:200]}. 1) Explanation 2) Example 3) Resources."
+        if not body.get("stream"):
+            return self._send_json(200, {"choices": [{"message": {"role": "assistant", "content": answer}}]})
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for n, word in enumerate(answer.split(" ")):
+            if srv.drop_after is not None and n >= srv.drop_after:
+                return  # no terminating chunk: the client sees the body end prematurely
+            chunk = {"choices": [{"delta": {"content": word + " "}}]}
+            self._send_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            time.sleep(srv.token_delay)
+        self._send_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+
+def start_server(port=0, **kwargs):
+    # -> running FakeChatServer on a daemon thread; port=0 picks a free port
+    srv = FakeChatServer(("127.0.0.1", port), **kwargs)
+    threading.Thread(target=srv.serve_forever, daemon=True, name="fake-chat").start()
+    return srv
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Fake Chat Completions server")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.3)
+    ap.add_argument("--jitter", type=float, default=0.1)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    args = ap.parse_args()
+    srv = FakeChatServer(("127.0.0.1", args.port), latency=args.latency, jitter=args.jitter,
+                         error_rate=args.error_rate)
+    print(f"fake chat server on {srv.base_url}")
+    srv.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
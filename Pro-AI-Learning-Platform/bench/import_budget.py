@@ -0,0 +1,79 @@
+# Cold-start import budget for LearningPlatform
+# Imports streamlit and then the app's own modules in a fresh interpreter with
+# `python -X importtime`, and fails when
+#   - the app modules together (on top of streamlit) take longer than --budget-ms, or
+#   - any of them eagerly imports a heavy optional dependency (numpy, pandas, requests, ...)
+# that should only load on first use. Best of --repeat runs, to damp disk-cache noise.
+#
+#   python bench/import_budget.py                  # check against the default budget
+#   python bench/import_budget.py --budget-ms 40 --verbose
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(HERE, "..", "LearningPlatform")
+
+APP_MODULES = ["config", "content", "metrics", "ai_client", "ai_jobs", "response_cache", "storage",
+               "leaderboard", "question_bank", "grading", "photos", "conversations", "review_batch", "sessions"]
+LAZY = ["numpy", "pandas", "requests", "urllib3", "PIL", "tiktoken", "pyarrow"]
+DEFAULT_BUDGET_MS = 60.0
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def measure(modules):
+    # -> [(module, cumulative_us, depth)] for everything imported after streamlit, in completion order
+    code = "import streamlit; " + "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=APP_DIR,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr.strip().splitlines()[-1])
+    rows, after = [], False
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m is None:
+            continue
+        name, cumulative, depth = m[4], int(m[2]), len(m[3]) // 2
+        if after:
+            rows.append((name, cumulative, depth))
+        elif name == "streamlit" and depth == 0:
+            after = True  # streamlit's own line prints last, once its whole subtree is done
+    return rows
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Fail if the app's modules blow the cold-start import budget")
+    ap.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args(argv)
+
+    best = None
+    for _ in range(args.repeat):
+        rows = measure(APP_MODULES)
+        total = sum(us for _, us, depth in rows if depth == 0)
+        if best is None or total < best[0]:
+            best = (total, rows)
+    total, rows = best
+    eager = sorted({name.split(".")[0] for name, _, _ in rows} & set(LAZY))
+
+    print(f"app modules: {total / 1000:.1f} ms (budget {args.budget_ms:.0f} ms, best of {args.repeat})")
+    if args.verbose:
+        for name, us, depth in sorted((r for r in rows if r[2] == 0), key=lambda r: -r[1]):
+            print(f"  {us / 1000:7.1f} ms  {name}")
+    failed = False
+    if eager:
+        print(f"FAIL: imported at start-up, should be lazy: {', '.join(eager)}")
+        failed = True
+    if total / 1000 > args.budget_ms:
+        print("FAIL: over budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+# Classroom load test for LearningPlatform/app.py
+# Drives the real script headlessly with streamlit.testing.v1.AppTest. Each simulated
+# student logs in, takes the Daily Quiz, asks the AI Tutor and pages the Leaderboard.
+# The AI upstream is bench/fake_chat_server.py, so call counts and latencies are local.
+# AppTest is not thread-safe, so concurrency comes from worker processes (like a
+# multi-process deployment): each worker runs its students back to back and shares
+# st.cache_resource objects between them, and all workers share the SQLite files.
+#
+#   python bench/load_test.py --students 20 --concurrency 10
+#   python bench/load_test.py --students 20 --save-baseline    # write bench/baselines.json
+#   python bench/load_test.py --students 20 --check            # exit 1 if p95 regressed
+#
+# Reports wall time per rerun (p50/p95/p99 overall and per step), pickled session-state
+# size per student and upstream call counts.
+
+import argparse
+import json
+import logging
+import os
+import pickle
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(HERE, "..", "LearningPlatform", "app.py")
+BASELINES = os.path.join(HERE, "baselines.json")
+sys.path.insert(0, HERE)
+
+from fake_chat_server import start_server  # noqa: E402
+
+DEMO_USERS = [("neel", "1234"), ("soumy", "1111"), ("vivek", "2222"), ("student", "student")]
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    s = sorted(values)
+    k = (len(s) - 1) * p / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+
+def _widget(elements, label):
+    return next(e for e in elements if e.label == label)
+
+
+def _quiet():
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+
+def simulate_student(n, base_url, stream):
+    # -> ([(step, seconds), ...], pickled session-state bytes)
+    from streamlit.testing.v1 import AppTest
+
+    timings = []
+
+    def run(step, at):
+        t = time.perf_counter()
+        at.run()
+        timings.append((step, time.perf_counter() - t))
+        if at.exception:
+            raise RuntimeError(f"student {n} {step}: {at.exception[0].value}")
+
+    user, password = DEMO_USERS[n % len(DEMO_USERS)]
+    at = AppTest.from_file(APP, default_timeout=60)
+    run("first_paint", at)
+
+    # login
+    _widget(at.text_input, "Username").input(user)
+    _widget(at.text_input, "Password").input(password)
+    _widget(at.button, "Login").click()
+    run("login", at)
+    run("dashboard", at)
+
+    # daily quiz: answer everything, then submit
+    for r in at.radio:
+        r.set_value(r.options[n % len(r.options)])
+    _widget(at.button, "Submit Quiz").click()
+    run("quiz_submit", at)
+
+    # AI tutor
+    _widget(at.text_input, "Paste DeepSeek/OpenRouter API Key (optional)").input("bench-key")
+    _widget(at.text_input, "Base URL").input(base_url)
+    at.toggle[0].set_value(stream)
+    _widget(at.text_area, "Type your question (be specific for best results)").input(
+        f"Explain gradient descent with an example ({n % 5})")
+    _widget(at.button, "Ask AI").click()
+    run("tutor_ask", at)
+    deadline = time.time() + 30
+    while "tutor_job" in at.session_state and time.time() < deadline:
+        time.sleep(0.2)
+        run("tutor_poll", at)
+
+    # leaderboard windows
+    for window in ("Today", "This week", "All time"):
+        _widget(at.selectbox, "Window").set_value(window)
+        run("leaderboard", at)
+
+    try:
+        size = len(pickle.dumps(at.session_state.to_dict()))
+    except Exception:
+        size = 0
+    return timings, size
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Simulate concurrent students against app.py")
+    ap.add_argument("--students", type=int, default=10)
+    ap.add_argument("--concurrency", type=int, default=5)
+    ap.add_argument("--latency", type=float, default=0.3, help="fake upstream latency (s)")
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--stream", action="store_true", help="use streaming answers instead of the job queue")
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--check", action="store_true", help="fail if p95 exceeds baseline by --tolerance")
+    ap.add_argument("--tolerance", type=float, default=1.3)
+    ap.add_argument("--name", default="default", help="baseline name")
+    args = ap.parse_args(argv)
+
+    _quiet()
+    srv = start_server(latency=args.latency, jitter=args.latency / 3, error_rate=args.error_rate)
+    data_dir = tempfile.mkdtemp(prefix="lp-bench-")
+    os.environ["APP_DATA_DIR"] = data_dir
+
+    t0 = time.perf_counter()
+    n = args.students
+    # workers must find the function under a real module name: AppTest replaces __main__
+    import load_test
+
+    with ProcessPoolExecutor(max_workers=args.concurrency, initializer=load_test._quiet) as pool:
+        results = list(pool.map(load_test.simulate_student, range(n), [srv.base_url] * n, [args.stream] * n))
+    elapsed = time.perf_counter() - t0
+    timings = [t for r, _ in results for t in r]
+    sizes = [size for _, size in results]
+
+    walls = [t for _, t in timings]
+    by_step = {}
+    for step, t in timings:
+        by_step.setdefault(step, []).append(t)
+    report = {
+        "students": args.students,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "reruns": len(walls),
+        "p50_ms": round(percentile(walls, 50) * 1000, 1),
+        "p95_ms": round(percentile(walls, 95) * 1000, 1),
+        "p99_ms": round(percentile(walls, 99) * 1000, 1),
+        "session_bytes_mean": int(statistics.mean(sizes)) if sizes else 0,
+        "upstream_calls": srv.calls,
+        "upstream_errors": srv.errors,
+        "steps": {k: {"n": len(v), "p50_ms": round(percentile(v, 50) * 1000, 1),
+                      "p95_ms": round(percentile(v, 95) * 1000, 1)} for k, v in sorted(by_step.items())},
+    }
+    srv.shutdown()
+    shutil.rmtree(data_dir, ignore_errors=True)
+    print(json.dumps(report, indent=2))
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as f:
+            baselines = json.load(f)
+    if args.save_baseline:
+        baselines[args.name] = report
+        with open(BASELINES, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"saved baseline '{args.name}' -> {BASELINES}")
+    if args.check:
+        base = baselines.get(args.name)
+        if base is None:
+            print(f"no baseline '{args.name}' in {BASELINES}")
+            return 2
+        limit = base["p95_ms"] * args.tolerance
+        if report["p95_ms"] > limit:
+            print(f"REGRESSION: p95 {report['p95_ms']} ms > {limit:.1f} ms (baseline {base['p95_ms']} ms)")
+            return 1
+        print(f"ok: p95 {report['p95_ms']} ms within {args.tolerance}x of baseline {base['p95_ms']} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
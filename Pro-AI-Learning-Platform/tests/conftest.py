@@ -0,0 +1,31 @@
+# the app modules are flat files in LearningPlatform/ (run with `streamlit run LearningPlatform/app.py`);
+# bench/ holds the fake Chat Completions server the client tests talk to
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "LearningPlatform"))
+sys.path.insert(0, os.path.join(HERE, "..", "bench"))
+
+
+@pytest.fixture
+def chat_server(monkeypatch):
+    # -> start(**FakeChatServer options); no latency, no retry backoff, sessions closed afterwards
+    import ai_client
+    from fake_chat_server import start_server
+
+    monkeypatch.setattr(ai_client, "BACKOFF_FACTOR", 0)
+    servers = []
+
+    def start(**kwargs):
+        kwargs = {"latency": 0, "jitter": 0, "token_delay": 0, **kwargs}
+        servers.append(start_server(**kwargs))
+        return servers[-1]
+
+    yield start
+    ai_client.close_sessions()
+    for srv in servers:
+        srv.shutdown()
+        srv.server_close()
@@ -0,0 +1,47 @@
+from ai_client import MAX_RETRIES, call_ai_chat
+
+MSGS = [{"role": "user", "content": "What is overfitting?"}]
+
+
+def test_answer_comes_back(chat_server):
+    srv = chat_server()
+    txt, err = call_ai_chat(MSGS, "key", srv.base_url)
+    assert err is None
+    assert txt.startswith("Fake answer about: What is overfitting?")
+
+
+def test_retries_429_and_5xx_then_succeeds(chat_server):
+    srv = chat_server(fail_codes=[429, 503])
+    txt, err = call_ai_chat(MSGS, "key", srv.base_url)
+    assert err is None and txt
+    assert srv.calls == 3
+
+
+def test_gives_up_after_max_retries(chat_server):
+    srv = chat_server(fail_codes=[500] * (MAX_RETRIES + 5))
+    txt, err = call_ai_chat(MSGS, "key", srv.base_url)
+    assert txt is None
+    assert err.startswith("API error 500")
+    assert srv.calls == MAX_RETRIES + 1
+
+
+def test_client_errors_are_not_retried(chat_server):
+    srv = chat_server(fail_codes=[400])
+    txt, err = call_ai_chat(MSGS, "key", srv.base_url)
+    assert txt is None and err.startswith("API error 400")
+    assert srv.calls == 1
+
+
+def test_keep_alive_connection_is_reused(chat_server):
+    srv = chat_server()
+    for _ in range(5):
+        assert call_ai_chat(MSGS, "key", srv.base_url)[1] is None
+    assert srv.calls == 5
+    assert srv.connections == 1
+
+
+def test_missing_key_fails_without_a_request(chat_server):
+    srv = chat_server()
+    txt, err = call_ai_chat(MSGS, "", srv.base_url)
+    assert txt is None and "API key missing" in err
+    assert srv.calls == 0
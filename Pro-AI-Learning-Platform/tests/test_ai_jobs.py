@@ -0,0 +1,48 @@
+import threading
+import time
+
+from ai_jobs import AIDispatcher
+
+
+def slow_call(messages, api_key, base_url, model):
+    time.sleep(0.05)
+    return f"{api_key}:{messages[0]['content']}", None
+
+
+def msgs(text):
+    return [{"role": "user", "content": text}]
+
+
+def test_one_keys_backlog_does_not_delay_another_key():
+    d = AIDispatcher(workers=2, rate=1, burst=1, call=slow_call)
+    backlog = [d.submit(msgs(f"a{i}"), "keyA", "http://x/v1") for i in range(4)]
+    time.sleep(0.1)  # keyA's burst is spent; its remaining jobs wait on its bucket
+    t = time.perf_counter()
+    status, txt, err = d.wait(d.submit(msgs("b"), "keyB", "http://x/v1"), timeout=5)
+    assert (status, txt, err) == ("done", "keyB:b", None)
+    assert time.perf_counter() - t < 1.0  # behind keyA it would wait about 2 s
+    assert d.poll(backlog[-1])[0] != "done"  # keyA is still rate limited
+
+
+def test_identical_inflight_requests_share_one_call():
+    calls, gate = [], threading.Event()
+
+    def call(messages, api_key, base_url, model):
+        calls.append(messages)
+        gate.wait(5)
+        return "answer", None
+
+    d = AIDispatcher(workers=2, rate=100, burst=10, call=call)
+    ids = {d.submit(msgs("q"), "k", "http://x/v1") for _ in range(3)}
+    gate.set()
+    assert len(ids) == 1
+    assert d.wait(ids.pop(), timeout=5) == ("done", "answer", None)
+    assert len(calls) == 1 and d.stats()["coalesced"] == 2
+
+
+def test_acquire_spends_the_same_bucket():
+    d = AIDispatcher(workers=1, rate=10, burst=2, call=slow_call)
+    t = time.perf_counter()
+    for _ in range(4):
+        d.acquire("k", "http://x/v1")
+    assert time.perf_counter() - t >= 0.15  # 2 from the burst, 2 more at 10/s
@@ -0,0 +1,36 @@
+from ai_client import stream_ai_chat
+
+MSGS = [{"role": "user", "content": "Explain bias vs variance"}]
+
+
+def test_tokens_arrive_in_order_and_join_to_the_answer(chat_server):
+    srv = chat_server()
+    stream, err = stream_ai_chat(MSGS, "key", srv.base_url)
+    assert err is None
+    tokens = list(stream)
+    assert len(tokens) > 5
+    assert "".join(tokens).startswith("Fake answer about: Explain bias vs variance.")
+    assert stream.error is None
+
+
+def test_dropped_stream_sets_error_instead_of_adding_text(chat_server):
+    srv = chat_server(drop_after=3)
+    stream, err = stream_ai_chat(MSGS, "key", srv.base_url)
+    assert err is None
+    tokens = list(stream)
+    assert tokens == ["Fake ", "answer ", "about: "]  # the partial answer, nothing appended
+    assert stream.error.startswith("Stream interrupted")
+
+
+def test_error_status_is_returned_before_streaming(chat_server):
+    srv = chat_server(fail_codes=[401])
+    stream, err = stream_ai_chat(MSGS, "key", srv.base_url)
+    assert stream is None
+    assert err.startswith("API error 401")
+
+
+def test_stream_request_is_retried_on_503(chat_server):
+    srv = chat_server(fail_codes=[503])
+    stream, err = stream_ai_chat(MSGS, "key", srv.base_url)
+    assert err is None and "".join(stream)
+    assert srv.calls == 2
@@ -0,0 +1,72 @@
+import threading
+
+from conversations import ConversationStore
+
+LONG = "word " * 60
+
+
+def thread_with_history(store, exchanges=6):
+    tid = store.new_thread("neel", "AI")
+    for i in range(exchanges):
+        store.add_exchange(tid, f"question {i} {LONG}", f"answer {i} {LONG}")
+    return tid
+
+
+def summary_state(store, tid):
+    return store.db.execute("SELECT summary, summarized_upto FROM tutor_threads WHERE id=?", (tid,)).fetchone()
+
+
+def test_one_summary_per_thread_at_a_time(tmp_path):
+    store = ConversationStore(str(tmp_path / "c.sqlite3"), budget=200, summarize_every=50)
+    tid = thread_with_history(store)
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def slow(previous, turns):
+        calls.append(turns)
+        started.set()
+        release.wait(5)
+        return "summary"
+
+    first = threading.Thread(target=store.maybe_summarize, args=(tid, slow))
+    first.start()
+    assert started.wait(5)
+    assert store.maybe_summarize(tid, slow) is False  # a second answer arriving meanwhile
+    release.set()
+    first.join(5)
+    assert len(calls) == 1
+    assert summary_state(store, tid)[0] == "summary"
+
+
+def test_a_slower_summary_from_another_process_cannot_move_the_cursor_back(tmp_path):
+    path = str(tmp_path / "c.sqlite3")
+    a = ConversationStore(path, budget=200, summarize_every=50)
+    b = ConversationStore(path, budget=200, summarize_every=50)  # stands in for a second server
+    tid = thread_with_history(a)
+    started, release, result = threading.Event(), threading.Event(), []
+
+    def slow(previous, turns):
+        started.set()
+        release.wait(5)
+        return "stale"
+
+    t = threading.Thread(target=lambda: result.append(a.maybe_summarize(tid, slow)))
+    t.start()
+    assert started.wait(5)
+    b.add_exchange(tid, f"later question {LONG}", f"later answer {LONG}")
+    assert b.maybe_summarize(tid, lambda previous, turns: "fresh")
+    fresh = summary_state(b, tid)
+    release.set()
+    t.join(5)
+    assert result == [False]
+    assert summary_state(a, tid) == fresh
+
+
+def test_context_stays_within_budget_after_summarizing(tmp_path):
+    store = ConversationStore(str(tmp_path / "c.sqlite3"), budget=200, summarize_every=50)
+    tid = thread_with_history(store)
+    assert store.maybe_summarize(tid)
+    upto = summary_state(store, tid)[1]
+    msgs = store.build_messages(tid, "system", "next question")
+    assert msgs[1]["content"].startswith("Summary of the earlier conversation")
+    later = [r[0] for r in store.db.execute("SELECT content FROM tutor_turns WHERE id>?", (upto,))]
+    assert all(m["content"] in later for m in msgs[2:-1])  # folded turns are not repeated
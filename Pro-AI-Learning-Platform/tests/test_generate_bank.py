@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+import pytest
+
+from ai_client import DEFAULT_MODEL
+from ai_jobs import AIDispatcher
+from generate_bank import Checkpoint, NearDupIndex, assemble, run_tasks
+from question_bank import QuestionBank
+
+TASKS = [("AI", "search", 1), ("AI", "ethics", 2), ("ML", "regression", 1), ("ML", "clustering", 3)]
+META = {"per_task": 6, "practice_per_task": 1}
+
+
+def bank_args(srv):
+    return SimpleNamespace(api_key="key", base_url=srv.base_url, model=DEFAULT_MODEL, per_task=6,
+                           practice_per_task=1)
+
+
+def quiet(*args):
+    pass
+
+
+def test_resumed_run_only_sends_missing_tasks_and_publishes_the_same_bank(chat_server, tmp_path):
+    srv = chat_server()
+    dispatcher = AIDispatcher(workers=4, rate=100, burst=100)
+    path = str(tmp_path / "run.checkpoint.jsonl")
+    ckpt = Checkpoint(path, META)
+    assert run_tasks(TASKS[:2], ckpt, dispatcher, bank_args(srv), log=quiet) == []  # "interrupted" here
+    assert srv.calls == 2
+
+    resumed = Checkpoint(path, META)
+    assert set(resumed.done) == set(TASKS[:2])
+    assert run_tasks(TASKS, resumed, dispatcher, bank_args(srv), log=quiet) == []
+    assert srv.calls == 4  # only the two missing tasks were sent
+
+    single = Checkpoint(str(tmp_path / "single.checkpoint.jsonl"), META)
+    run_tasks(TASKS, single, dispatcher, bank_args(srv), log=quiet)
+    assert assemble(TASKS, resumed, QuestionBank()) == assemble(TASKS, single, QuestionBank())
+
+
+def test_checkpoint_from_other_settings_is_refused(tmp_path):
+    path = str(tmp_path / "run.checkpoint.jsonl")
+    Checkpoint(path, META)
+    with pytest.raises(SystemExit):
+        Checkpoint(path, {**META, "per_task": 8})
+
+
+def test_near_dup_index_catches_exact_and_near_duplicates():
+    idx = NearDupIndex()
+    q = "Which metric best evaluates a binary classifier on a heavily imbalanced dataset?"
+    assert idx.add_if_new(q)
+    assert not idx.add_if_new("  which METRIC best evaluates a binary classifier on a heavily imbalanced dataset ")
+    assert not idx.add_if_new(q.replace("dataset", "corpus"))  # last word changed: Jaccard 9/11
+    assert idx.add_if_new("Which loss function is used for training logistic regression models?")
+
+
+def test_assemble_drops_duplicates_within_the_run_and_against_other_banks(tmp_path):
+    opts = ["precision", "recall", "accuracy", "f1 score"]
+    mcq = lambda q: {"question": q, "options": opts, "answer": "f1 score"}
+    q1 = "Which metric best evaluates a binary classifier on a heavily imbalanced dataset?"
+    q2 = "Which metric would you report for a spam filter where false positives are costly?"
+    q3 = "Which metric summarizes precision and recall as their harmonic mean for a classifier?"
+    ckpt = Checkpoint(str(tmp_path / "c.jsonl"), META)
+    ckpt.record(TASKS[0], [mcq(q1), mcq(q1.upper())], ["Explain precision vs recall with an example."])
+    ckpt.record(TASKS[1], [mcq(q2), mcq(q3)], ["Explain precision vs recall with an example!"])
+    existing = QuestionBank()
+    existing.extend([{"program": "ML", "topic": "evaluation", "difficulty": 1, **mcq(q3)}])
+    rows, dropped = assemble(TASKS[:2], ckpt, existing)
+    assert [r.get("question") or r.get("prompt") for r in rows] == [
+        q1, "Explain precision vs recall with an example.", q2]
+    assert dropped == 3
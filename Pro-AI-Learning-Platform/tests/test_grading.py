@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import grading
+from question_bank import QuestionBank
+
+# 3 questions with answers at option 0, 1 and 2; 4 attempts, best to worst.
+# Attempt 3 left question 2 blank; attempt 4's last slot is a question the bank no longer has.
+KEY = np.array([0, 1, 2], dtype=np.int16)
+QIDS = np.array([[0, 1, 2], [0, 1, 2], [0, 1, 2], [0, 1, -1]], dtype=np.int32)
+CHOSEN = np.array([[0, 1, 2], [0, 1, 0], [0, 0, -1], [1, 0, 0]], dtype=np.int16)
+
+
+def test_grade_scores_each_attempt():
+    correct, scores = grading.grade(QIDS, CHOSEN, KEY)
+    assert correct.tolist() == [[True, True, True], [True, True, False], [True, False, False],
+                                [False, False, False]]
+    assert scores.tolist() == [15, 10, 5, 0]
+
+
+def test_item_stats_on_a_hand_built_matrix():
+    correct, _ = grading.grade(QIDS, CHOSEN, KEY)
+    stats = grading.item_stats(QIDS, CHOSEN, correct, n_items=3, n_options=3, group_frac=0.5)
+    assert stats["asked"].tolist() == [4, 4, 3]
+    assert stats["p_value"] == pytest.approx([3 / 4, 2 / 4, 1 / 3])
+    # upper half = attempts 1-2, lower half = attempts 3-4
+    assert stats["discrimination"] == pytest.approx([0.5, 1.0, 0.5])
+    assert stats["option_counts"].tolist() == [[3, 1, 0], [2, 2, 0], [1, 0, 1]]
+
+
+def test_never_asked_items_have_nan_p_value():
+    correct, _ = grading.grade(QIDS, CHOSEN, KEY)
+    stats = grading.item_stats(QIDS, CHOSEN, correct, n_items=4, n_options=3)
+    assert stats["asked"][3] == 0
+    assert np.isnan(stats["p_value"][3])
+
+
+def test_encode_attempts_against_a_bank():
+    bank = QuestionBank()
+    bank.extend([{"question": f"Question {i}?", "options": ["a", "b", "c", "d"], "answer": "abcd"[i]}
+                 for i in range(3)])
+    qids, chosen = grading.encode_attempts(bank, [
+        [("Question 0?", "a"), ("question 1?", "c")],       # matched case-insensitively
+        [("Gone?", "a"), ("Question 2?", "not an option"), ("Question 2?", None)],
+    ])
+    assert qids.tolist() == [[0, 1, -1], [-1, 2, 2]]
+    assert chosen.tolist() == [[0, 2, -1], [-1, -1, -1]]
+    _, scores = grading.grade(qids, chosen, grading.answer_key(bank))
+    assert scores.tolist() == [5, 0]
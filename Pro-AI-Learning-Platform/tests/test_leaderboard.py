@@ -0,0 +1,159 @@
+import multiprocessing
+import random
+import sqlite3
+import threading
+import time
+
+import leaderboard
+from leaderboard import Leaderboard, RankIndex
+from storage import Storage
+
+
+def naive_rank(points, value):
+    return 1 + sum(p > value for p in points)
+
+
+def test_ranks_ties_share_the_best_rank():
+    idx = RankIndex(size=16)
+    for p in (5, 5, 3, 9):
+        idx.add(p)
+    assert [idx.rank(v) for v in (9, 5, 3, 0)] == [1, 2, 4, 5]
+
+
+def test_grow_keeps_counts_and_ranks():
+    idx = RankIndex(size=4)
+    points = [0, 1, 1, 3, 2]
+    for p in points:
+        idx.add(p)
+    idx.add(100)  # past the end: doubles up to 128
+    points.append(100)
+    assert idx.size == 128
+    assert idx.total == len(points)
+    for v in range(0, 130):
+        assert idx.rank(v) == naive_rank(points, v), v
+    assert idx.prefix(10_000) == len(points)
+
+
+def test_ranks_match_naive_count_across_many_grows():
+    rng = random.Random(7)
+    idx = RankIndex(size=2)
+    points = []
+    for _ in range(500):
+        if points and rng.random() < 0.3:
+            # a user gains points: move them to the new value, as Leaderboard.record does
+            i = rng.randrange(len(points))
+            gain = rng.randint(1, 3000)
+            idx.add(points[i], -1)
+            points[i] += gain
+            idx.add(points[i])
+        else:
+            points.append(rng.randint(0, 5000))
+            idx.add(points[-1])
+    assert idx.size >= max(points) + 1
+    assert idx.total == len(points)
+    for v in set(points) | {0, max(points) + 1}:
+        assert idx.rank(v) == naive_rank(points, v), v
+
+
+def _backfill(path, barrier, errors):
+    barrier.wait()
+    try:
+        Leaderboard(path).backfill_from_attempts()
+    except Exception as e:
+        errors.put(repr(e))
+
+
+def test_backfill_runs_once_when_processes_start_together(tmp_path):
+    path = str(tmp_path / "platform.sqlite3")
+    db = Storage(path)
+    for user, score in [("neel", 5), ("neel", 9), ("vivek", 7)]:
+        db.add_quiz_attempt(user, "AI", "2026-10-17", score, 20)
+    with db.db:  # enough history that the backfills overlap
+        db.db.executemany("INSERT INTO quiz_attempts(username, program, day, score, max_score, created) "
+                          "VALUES (?,?,?,?,?,0)",
+                          [(f"u{i}", "ML", f"2026-09-{1 + i % 28:02d}", 1, 20) for i in range(20000)])
+    ctx = multiprocessing.get_context("spawn")
+    barrier, errors = ctx.Barrier(4), ctx.Queue()
+    procs = [ctx.Process(target=_backfill, args=(path, barrier, errors)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+    assert errors.empty(), errors.get()
+    lb = Leaderboard(path)
+    assert lb.rank_of("all", "neel") == (1, 9)  # best attempt of the day only
+    assert lb.rank_of("all", "vivek") == (2, 7)
+
+
+def test_record_counts_only_the_best_attempt_per_program_and_day(tmp_path):
+    lb = Leaderboard(str(tmp_path / "lb.sqlite3"))
+    assert lb.record("neel", "AI", "2026-10-18", 5) == 5
+    assert lb.record("neel", "AI", "2026-10-18", 3) == 0   # worse: nothing added
+    assert lb.record("neel", "AI", "2026-10-18", 5) == 0   # resubmitting the same score
+    assert lb.record("neel", "AI", "2026-10-18", 9) == 4   # better: only the difference
+    assert lb.record("neel", "ML", "2026-10-18", 2) == 2   # another program, same day
+    assert lb.record("neel", "AI", "2026-10-19", 6) == 6   # next day, a new ISO week
+    assert lb.rank_of("all", "neel")[1] == 17
+    assert lb.rank_of("day:2026-10-18", "neel")[1] == 11
+    assert lb.rank_of("day:2026-10-19", "neel")[1] == 6
+    assert lb.rank_of("week:2026-W42", "neel")[1] == 11
+    assert lb.rank_of("week:2026-W43", "neel")[1] == 6
+    assert lb.rank_of("program:AI", "neel")[1] == 15
+    assert lb.rank_of("program:ML", "neel")[1] == 2
+
+
+def test_zero_score_first_attempt_returns_zero_but_counts_later_gains(tmp_path):
+    lb = Leaderboard(str(tmp_path / "lb.sqlite3"))
+    assert lb.record("vivek", "AI", "2026-10-12", 0) == 0
+    assert lb.rank_of("all", "vivek") == (1, 0)
+    assert lb.record("vivek", "AI", "2026-10-12", 4) == 4
+    assert lb.rank_of("all", "vivek") == (1, 4)
+
+
+def test_ranks_and_pages_follow_records(tmp_path):
+    lb = Leaderboard(str(tmp_path / "lb.sqlite3"))
+    for user, score in [("neel", 8), ("soumy", 12), ("vivek", 8), ("student", 3)]:
+        lb.record(user, "AI", "2026-10-12", score)
+    assert lb.size("all") == 4
+    lb.record("student", "AI", "2026-10-12", 20)  # index is updated in place
+    assert [(r["Rank"], r["Name"], r["Points"]) for r in lb.page("all", 0, 3)] == [
+        (1, "Student", 20), (2, "Soumy", 12), (3, "Neel", 8)]
+    assert lb.rank_of("all", "vivek") == (3, 8)  # ties share the best rank
+    assert lb.rank_of("all", "nobody") == (None, 0)
+
+
+def test_writes_during_a_rebuild_are_replayed_into_the_new_index(tmp_path, monkeypatch):
+    lb = Leaderboard(str(tmp_path / "lb.sqlite3"), index_ttl=0)
+    for user, score in [("neel", 8), ("soumy", 12), ("vivek", 5)]:
+        lb.record(user, "AI", "2026-10-12", score)
+    lb.size("all")  # build the first index
+    scanned, go = threading.Event(), threading.Event()
+    connect = sqlite3.connect
+
+    class PausedScan:
+        # the rebuild's snapshot is taken, then it waits while a write lands
+        def __init__(self, *args, **kwargs):
+            self.conn = connect(*args, **kwargs)
+
+        def execute(self, *args):
+            rows = self.conn.execute(*args).fetchall()
+            scanned.set()
+            go.wait(5)
+            return iter(rows)
+
+        def close(self):
+            self.conn.close()
+
+    monkeypatch.setattr(leaderboard.sqlite3, "connect", PausedScan)
+    lb.size("all")  # stale: starts the background rebuild
+    assert scanned.wait(5)
+    assert lb.record("vivek", "AI", "2026-10-12", 20) == 15  # not in the rebuild's snapshot
+    go.set()
+    deadline = time.monotonic() + 5
+    while "all" in lb._pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    idx, users = lb._indexes["all"][:2]
+    assert users == {"neel": 8, "soumy": 12, "vivek": 20}
+    assert idx.total == 3
+    assert [idx.rank(p) for p in (20, 12, 8)] == [1, 2, 3]
+    assert all(idx._count_at(v) >= 0 for v in range(idx.size))
@@ -0,0 +1,10 @@
+import metrics
+
+
+def test_values_keep_full_precision():
+    h = metrics.Histogram("test_payload_bytes", "test", buckets=metrics.BYTES_BUCKETS)
+    h.observe(1234567.8)
+    h.observe(0.1)
+    out = metrics.render_prometheus().splitlines()
+    assert f"test_payload_bytes_sum {1234567.8 + 0.1!r}" in out  # :g printed 1.23457e+06
+    assert "test_payload_bytes_count 2" in out
@@ -0,0 +1,60 @@
+from question_bank import GENERAL, QuestionBank
+
+
+def make_bank(own=30, general=40, other=10):
+    rows = []
+    for program, count in (("AI", own), (GENERAL, general), ("ML", other)):
+        for i in range(count):
+            rows.append({"program": program, "topic": "t", "difficulty": 1 + i % 3,
+                         "question": f"{program} question {i}?", "options": [f"right {i}", "b", "c", "d"],
+                         "answer": f"right {i}"})
+    bank = QuestionBank()
+    bank.extend(rows)
+    return bank
+
+
+def test_same_seed_gives_the_same_quiz():
+    bank = make_bank()
+    quiz = bank.daily_quiz_ids("neel", "AI", "2026-10-17")
+    assert quiz == bank.daily_quiz_ids("neel", "AI", "2026-10-17")
+    assert quiz == make_bank().daily_quiz_ids("neel", "AI", "2026-10-17")  # fresh process, same bank
+    assert quiz != bank.daily_quiz_ids("neel", "AI", "2026-10-18")
+    assert quiz != bank.daily_quiz_ids("vivek", "AI", "2026-10-17")
+
+
+def test_quiz_has_no_duplicates_and_only_program_or_general_questions():
+    bank = make_bank()
+    ids = bank.daily_quiz_ids("neel", "AI", "2026-10-17", n=20)
+    assert len(ids) == 20 == len(set(ids))
+    assert {i for i in ids} <= set(bank.by_program["AI"]) | set(bank.by_program[GENERAL])
+
+
+def split(bank, n=20):
+    ids = bank.daily_quiz_ids("neel", "AI", "2026-10-17", n=n)
+    own = set(bank.by_program.get("AI", ()))
+    return sum(i in own for i in ids), sum(i not in own for i in ids)
+
+
+def test_half_own_half_general_when_both_pools_are_large():
+    assert split(make_bank(own=30, general=40)) == (10, 10)
+
+
+def test_own_questions_fill_in_for_a_small_general_pool():
+    assert split(make_bank(own=30, general=4)) == (16, 4)
+
+
+def test_general_questions_fill_in_for_a_small_program_pool():
+    assert split(make_bank(own=3, general=40)) == (3, 17)
+
+
+def test_small_bank_gives_a_shorter_quiz_without_repeats():
+    assert split(make_bank(own=5, general=6)) == (5, 6)
+
+
+def test_daily_quiz_shuffles_options_but_keeps_the_answer():
+    bank = make_bank()
+    quiz = bank.daily_quiz("neel", "AI", "2026-10-17")
+    assert quiz == bank.daily_quiz("neel", "AI", "2026-10-17")
+    for q, opts, ans in quiz:
+        assert ans in opts and sorted(opts) == sorted(bank.item(bank.id_of(q))[1])
+    assert any(opts[0] != ans for _, opts, ans in quiz)  # the answer is not always first
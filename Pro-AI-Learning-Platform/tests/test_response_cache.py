@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+import response_cache
+from response_cache import ResponseCache
+
+SYSTEM = "You are an expert tutor in ML."
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    return now
+
+
+def open_cache(tmp_path, **kwargs):
+    return ResponseCache(str(tmp_path / "cache.sqlite3"), **kwargs)
+
+
+def test_exact_hit_ignores_case_spacing_and_punctuation(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.put(SYSTEM, "What is overfitting?", "answer")
+    assert cache.get(SYSTEM, "  what is   OVERFITTING ") == "answer"
+    assert cache.get("You are an expert tutor in AI.", "What is overfitting?") is None  # other scope
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = open_cache(tmp_path, ttl_seconds=60)
+    cache.put(SYSTEM, "What is overfitting?", "answer")
+    clock[0] += 59
+    assert cache.get(SYSTEM, "What is overfitting?") == "answer"
+    clock[0] += 2
+    assert cache.get(SYSTEM, "What is overfitting?") is None
+    cache.put(SYSTEM, "What is bias?", "other")  # the put sweeps expired rows
+    assert cache.stats()["size"] == 1
+
+
+def test_least_recently_used_rows_go_first(tmp_path, clock):
+    cache = open_cache(tmp_path, max_entries=2)
+    cache.put(SYSTEM, "q one", "1")
+    clock[0] += 1
+    cache.put(SYSTEM, "q two", "2")
+    clock[0] += 1
+    assert cache.get(SYSTEM, "q one") == "1"  # touched: now newer than "q two"
+    clock[0] += 1
+    cache.put(SYSTEM, "q three", "3")
+    assert cache.stats()["size"] == 2
+    assert cache.get(SYSTEM, "q two") is None
+    assert cache.get(SYSTEM, "q one") == "1" and cache.get(SYSTEM, "q three") == "3"
+
+
+def test_semantic_hit_for_a_near_identical_question(tmp_path):
+    cache = open_cache(tmp_path, semantic=True, threshold=0.8)
+    cache.put(SYSTEM, "explain the difference between bias and variance in machine learning", "bv")
+    cache.put(SYSTEM, "what is gradient descent", "gd")
+    assert cache.get(SYSTEM, "explain the difference between bias and variance in machine learning please") == "bv"
+    assert cache.get(SYSTEM, "what is a decision tree") is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_index_follows_puts_and_evictions(tmp_path, clock):
+    cache = open_cache(tmp_path, max_entries=2, semantic=True, threshold=0.8)
+    cache.put(SYSTEM, "explain bias and variance tradeoff", "bv")
+    cache.get(SYSTEM, "nothing cached like this")  # builds the scope's index
+    idx = cache._indexes[response_cache._digest(response_cache.normalize(SYSTEM))]
+    clock[0] += 1
+    cache.put(SYSTEM, "explain gradient descent with momentum", "gd")  # added in place
+    assert len(idx.tf) == 2
+    assert cache.get(SYSTEM, "explain gradient descent with momentum please") == "gd"
+    clock[0] += 1
+    cache.put(SYSTEM, "explain random forest feature importance", "rf")  # evicts the bias question
+    assert len(idx.tf) == 2 and "bias" not in idx.postings
+    assert cache.get(SYSTEM, "explain bias and variance tradeoff please") is None
+    assert cache._indexes[response_cache._digest(response_cache.normalize(SYSTEM))] is idx  # not rebuilt
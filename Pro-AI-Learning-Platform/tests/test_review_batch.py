@@ -0,0 +1,69 @@
+import json
+import re
+import threading
+import time
+
+from ai_jobs import AIDispatcher
+from review_batch import BulkReview, ReviewStore, load_submissions
+
+ROWS = [{"student": f"s{i}", "question": f"Explain topic {i % 2}", "answer": f"answer number {i}"}
+        for i in range(6)]
+
+
+def grader(gate, skip):
+    # grades every numbered answer except those in skip (each skipped once)
+    def call(messages, api_key, base_url, model):
+        gate.wait(5)
+        found = re.findall(r"\[(\d+)\] \(answer to Q\d+\) (.*)", messages[-1]["content"])
+        results = []
+        for n, answer in found:
+            if answer in skip:
+                skip.discard(answer)
+                continue
+            results.append({"id": int(n), "score": 7, "feedback": "ok"})
+        return json.dumps({"results": results}), None
+
+    return call
+
+
+def run(review, limit=5.0):
+    t = time.perf_counter()
+    while not review.step():
+        assert time.perf_counter() - t < limit
+        time.sleep(0.01)
+    return review.results()
+
+
+def test_step_does_not_block_and_retries_skipped_answers(tmp_path):
+    gate = threading.Event()
+    call = grader(gate, {"answer number 3"})
+    d = AIDispatcher(workers=2, rate=100, burst=10, call=call)
+    review = BulkReview(ROWS, d, "k", "http://x/v1", store=ReviewStore(str(tmp_path / "r.sqlite3")),
+                        batch_size=4, log=lambda msg: None)
+    t = time.perf_counter()
+    assert review.step() is False  # upstream is held: polling returns at once
+    assert time.perf_counter() - t < 0.5
+    gate.set()
+    results, stats = run(review)
+    assert [r["score"] for r in results] == [7] * 6
+    assert stats == {"rows": 6, "unique": 6, "cached": 0, "requests": 3, "failed": 0}  # 2 batches + 1 retry
+
+
+def test_graded_answers_come_from_the_store_next_time(tmp_path):
+    gate = threading.Event()
+    gate.set()
+    call = grader(gate, set())
+    d = AIDispatcher(workers=2, rate=100, burst=10, call=call)
+    store = ReviewStore(str(tmp_path / "r.sqlite3"))
+    run(BulkReview(ROWS[:4], d, "k", "http://x/v1", store=store, log=lambda msg: None))
+    results, stats = run(BulkReview(ROWS, d, "k", "http://x/v1", store=store, log=lambda msg: None))
+    assert stats["cached"] == 4 and stats["requests"] == 1
+    assert [r["source"] for r in results] == ["cached"] * 4 + ["ai"] * 2
+
+
+def test_load_submissions_reads_csv_from_disk(tmp_path):
+    path = tmp_path / "answers.csv"
+    path.write_text("\ufeffusername,question,answer\nneel,What is AI?,Machines that learn\nvivek,What is AI?,\n",
+                    encoding="utf-8")
+    assert load_submissions(str(path)) == [{"student": "neel", "question": "What is AI?",
+                                            "answer": "Machines that learn"}]
@@ -0,0 +1,137 @@
+import time
+
+import pytest
+
+import sessions
+from sessions import AuthStore, MemoryKV, SQLiteKV
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # shared fake clock for the stores' TTL checks
+    now = [time.time()]
+    monkeypatch.setattr(sessions.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def kv(request, tmp_path):
+    return MemoryKV() if request.param == "memory" else SQLiteKV(str(tmp_path / "sessions.sqlite3"))
+
+
+@pytest.fixture
+def auth(kv):
+    return AuthStore(kv, secret="test-secret", ttl=60)
+
+
+def test_valid_token_resolves(auth):
+    assert auth.resolve(auth.create_session("neel")) == "neel"
+
+
+def test_forged_tokens_are_rejected(auth):
+    token = auth.create_session("neel")
+    payload, sig = token.split(".")
+    other = AuthStore(MemoryKV(), secret="another-secret").create_session("admin")
+    forged = [
+        other,                                             # signed with a different key
+        other.split(".")[0] + "." + sig,                   # someone else's payload, neel's signature
+        payload + "." + sig[:-2] + ("AA" if sig[-2:] != "AA" else "BB"),  # tampered signature
+        payload,                                           # no signature
+        "",
+        "not.a.token.at.all",
+        "é.é",
+    ]
+    for token in forged:
+        assert auth.resolve(token) is None, token
+        assert auth.rotate(token) == (None, None), token
+
+
+def test_signed_token_without_server_record_is_rejected(kv):
+    # valid signature, but the session was never stored (e.g. minted with a leaked secret elsewhere)
+    token = AuthStore(MemoryKV(), secret="test-secret").create_session("neel")
+    assert AuthStore(kv, secret="test-secret").resolve(token) is None
+
+
+def test_expired_token_is_rejected(auth, clock):
+    token = auth.create_session("neel")
+    clock[0] += 59
+    assert auth.resolve(token) == "neel"  # refreshes the TTL
+    clock[0] += 59
+    assert auth.resolve(token) == "neel"
+    clock[0] += 61
+    assert auth.resolve(token) is None
+
+
+def test_revoked_token_is_rejected(auth):
+    token = auth.create_session("neel")
+    keep = auth.create_session("neel")
+    auth.revoke(token)
+    assert auth.resolve(token) is None
+    assert auth.resolve(keep) == "neel"  # other sessions of the same user survive
+
+
+def test_rotate_makes_the_old_token_single_use(auth):
+    token = auth.create_session("neel")
+    username, fresh = auth.rotate(token)
+    assert username == "neel" and fresh != token
+    assert auth.rotate(token) == (None, None)
+    assert auth.resolve(fresh) == "neel"
+
+
+def test_shared_secret_is_picked_once(kv):
+    first, second = AuthStore(kv), AuthStore(kv)
+    assert second.resolve(first.create_session("neel")) == "neel"
+
+
+def test_verify_checks_hashed_password(auth):
+    auth.add_user("neel", "1234")
+    assert auth.verify("neel", "1234")
+    assert not auth.verify("neel", "12345")
+    assert not auth.verify("nobody", "1234")
+    assert "1234" not in auth.kv.get("auth:user:neel")
+
+
+def test_nx_does_not_overwrite_a_live_key(kv, clock):
+    assert kv.set("k", "a", ex=10, nx=True)
+    assert kv.set("k", "b", nx=True) is None
+    assert kv.get("k") == "a"
+
+
+def test_nx_takes_over_an_expired_key(kv, clock):
+    assert kv.set("k", "a", ex=10)
+    clock[0] += 11
+    assert kv.set("k", "b", ex=10, nx=True)
+    assert kv.get("k") == "b"
+    clock[0] += 5
+    assert kv.get("k") == "b"  # the new TTL applies, not the old one
+
+
+def test_sqlite_nx_takes_over_an_expired_row_still_on_disk(tmp_path, clock):
+    # no get() in between, so the expired row has not been cleaned up yet
+    kv = SQLiteKV(str(tmp_path / "kv.sqlite3"))
+    kv.set("lock", "old", ex=1)
+    clock[0] += 2
+    assert kv.db.execute("SELECT value FROM kv WHERE key='lock'").fetchone() == ("old",)
+    assert kv.set("lock", "new", nx=True)
+    assert kv.get("lock") == "new"
+    assert kv.set("lock", "newer", nx=True) is None  # no TTL now, so it never expires
+
+
+def test_memory_kv_evicts_least_recently_used():
+    kv = MemoryKV(max_keys=2)
+    kv.set("a", 1, ex=60)
+    kv.set("b", 2, ex=60)
+    kv.get("a")
+    kv.set("c", 3, ex=60)
+    assert kv.get("b") is None
+    assert kv.get("a") == 1 and kv.get("c") == 3
+
+
+def test_memory_kv_never_evicts_credentials_or_the_secret():
+    auth = AuthStore(MemoryKV(max_keys=10), ttl=60)
+    auth.seed({"neel": "1234"})
+    tokens = [auth.create_session("neel") for _ in range(50)]
+    assert auth.verify("neel", "1234")
+    assert auth.resolve(tokens[-1]) == "neel"
+    assert auth.resolve(tokens[0]) is None  # the oldest sessions were evicted
+    assert AuthStore(auth.kv).resolve(tokens[-1]) == "neel"  # same shared secret